@@ -1,9 +1,21 @@
 #!usr/bin/env python3
+import json
+import re
 import sys
 from pathlib import Path
 
+try:
+    import yaml
+except ImportError:  # install script must work without dependencies
+    yaml = None
+
 root_dir = Path(__file__).parent.resolve()
 
+DATA_HOME_PATTERN = re.compile(r"^\s*data_home:\s*(.+?)\s*$", re.MULTILINE)
+FIGURES_HOME_PATTERN = re.compile(
+    r"^\s*figures_home:\s*(.+?)\s*$", re.MULTILINE
+)
+
 
 def install():
     """
@@ -43,17 +55,14 @@ def create_dirs():
     """
     Create the required directory structure.
     """
-    with open(root_dir / "config.yaml", "r") as config_file:
-        lines = config_file.readlines()
-    data_home = None
-    figures_home = None
-    for line in lines:
-        line = line.lstrip()
-        line = line.rstrip("\n")
-        if line.startswith("data_home"):
-            data_home = line.removeprefix("data_home: ")
-        elif line.startswith("figures_home"):
-            figures_home = line.removeprefix("figures_home: ")
+    config = load_config(root_dir / "config.yaml")
+    if config is not None:
+        paths = config.get("paths") or {}
+        data_home = paths.get("data_home")
+        figures_home = paths.get("figures_home")
+    else:
+        with open(root_dir / "config.yaml", "r") as config_file:
+            data_home, figures_home = _parse_config_text(config_file.read())
 
     if not all([data_home, figures_home]):
         print("Could not parse config file, not all paths were found!")
@@ -71,9 +80,55 @@ def create_dirs():
 
     # create directories
     for directory in [data_home, external, figures_home]:
-        if not directory.exists():
-            print(f"Creating missing directory:{str(directory)}")
+        try:
             directory.mkdir(parents=True)
+        except FileExistsError:
+            continue
+        print(f"Created missing directory: {str(directory)}")
+
+
+def load_config(yaml_path: Path) -> dict | None:
+    """
+    Load a YAML file, using a JSON sidecar cache where possible.
+
+    The parsed content is written to a ``.cache.json`` file next to the
+    YAML file on first read. On subsequent reads, the JSON file is used
+    instead, as long as it is not older than the YAML file.
+
+    :param yaml_path: Path to the YAML file.
+    :return: The parsed YAML content. None if PyYAML is not available
+        and no valid cache exists.
+    """
+    cache = yaml_path.with_suffix(".cache.json")
+    if cache.exists() and cache.stat().st_mtime >= yaml_path.stat().st_mtime:
+        with open(cache, "r") as cache_file:
+            return json.load(cache_file)
+    if yaml is None:
+        return None
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    with open(yaml_path, "r") as yaml_file:
+        content = yaml.load(yaml_file, Loader=loader)
+    try:
+        serialized = json.dumps(content)
+        with open(cache, "w") as cache_file:
+            cache_file.write(serialized)
+    except (TypeError, OSError):
+        pass  # content not JSON-compatible or location not writable
+    return content
+
+
+def _parse_config_text(text: str) -> tuple[str | None, str | None]:
+    """
+    Parse data and figures home from the content of the config file.
+
+    Fallback for when PyYAML is not (yet) installed.
+    """
+    data_match = DATA_HOME_PATTERN.search(text)
+    figures_match = FIGURES_HOME_PATTERN.search(text)
+    data_home = data_match.group(1) if data_match else None
+    figures_home = figures_match.group(1) if figures_match else None
+    return data_home, figures_home
 
 
 if __name__ == "__main__":
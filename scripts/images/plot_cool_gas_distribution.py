@@ -1,19 +1,22 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
-root_dir = Path(__file__).parents[2].resolve()
+root_dir = Path(os.path.abspath(__file__)).parents[2]
 sys.path.insert(0, str(root_dir / "src"))
 
 from library import scriptparse
-from pipelines.images.cool_gas_images import (
-    PlotCoolGasDistrFromFile,
-    PlotCoolGasDistribution,
-)
 
 
 def main(args: argparse.Namespace) -> None:
     """Plot the cool gas distribution at redshift zero"""
+    # import pipelines only here, so that --help does not load them
+    from pipelines.images.cool_gas_images import (
+        PlotCoolGasDistrFromFile,
+        PlotCoolGasDistribution,
+    )
+
     # set simulation to TNG-Cluster, to get the correct cool gas history
     # archive file path
     args.sim = "TNG-Cluster"
@@ -1,21 +1,24 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
 import yaml
 
-root_dir = Path(__file__).parents[2].resolve()
+root_dir = Path(os.path.abspath(__file__)).parents[2]
 sys.path.insert(0, str(root_dir / "src"))
 
 from library import scriptparse
-from pipelines.mass_trends.cool_gas_fracs_clusters import (
-    ClusterCoolGasFromFilePipeline,
-    ClusterCoolGasMassTrendPipeline,
-)
 
 
 def main(args: argparse.Namespace) -> None:
     """Create plot of gas mass trends for individual halos"""
+    # import pipelines only here, so that --help does not load them
+    from pipelines.mass_trends.cool_gas_fracs_clusters import (
+        ClusterCoolGasFromFilePipeline,
+        ClusterCoolGasMassTrendPipeline,
+    )
+
     args.sim = "TNG-Cluster"
     # find type flag depending on field name
     if args.field is None:
@@ -104,7 +107,8 @@ if __name__ == "__main__":
     config_file = root_dir / "src/pipelines/mass_trends/plot_config.yaml"
     with open(config_file, "r") as f:
         stream = f.read()
-    configuration = yaml.full_load(stream)
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    configuration = yaml.load(stream, Loader=loader)
     available_fields = list(configuration.keys())
 
     # construct parser
@@ -92,7 +92,6 @@ if __name__ == "__main__":
         allowed_sims=("TNG300", "TNG-Cluster"),
     )
     parser.remove_argument("sim")
-    parser.remove_argument("processes")
     parser.remove_argument("to_file")
     parser.add_argument(
         "-t",
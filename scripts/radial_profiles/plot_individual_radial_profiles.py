@@ -1,22 +1,36 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
-import numpy as np
-
-root_dir = Path(__file__).parents[2].resolve()
+root_dir = Path(os.path.abspath(__file__)).parents[2]
 sys.path.insert(0, str(root_dir / "src"))
 
 from library import scriptparse
-from pipelines.radial_profiles.individuals import (
-    IndividualProfilesFromFilePipeline,
-    IndividualProfilesTNGClusterPipeline,
-    IndividualRadialProfilePipeline,
-)
+
+# histogram ranges, keyed by (core_only, normalize); units: R_vir or kpc
+# for the radial range, log K for the temperature range
+RANGES = {
+    (True, True): ((0, 0.05), (3, 8.5)),
+    (True, False): ((0, 100), (3, 8.5)),
+    (False, True): ((0, 2), (3, 8.5)),
+    (False, False): ((0, 2000), (3, 8.5)),
+}
+# temperature regime edges for density profiles in log K
+TEMPERATURE_REGIMES = (0, 4.5, 5.5, float("inf"))
 
 
 def main(args: argparse.Namespace) -> None:
     """Create histograms of temperature distribution"""
+    # import numpy and pipelines only here, so that --help does not load them
+    import numpy as np
+
+    from pipelines.radial_profiles.individuals import (
+        IndividualProfilesFromFilePipeline,
+        IndividualProfilesTNGClusterPipeline,
+        IndividualRadialProfilePipeline,
+    )
+
     # paths
     if args.core_only:
         type_flag = f"{args.what}_core"  # prevent overwriting
@@ -38,17 +52,10 @@ def main(args: argparse.Namespace) -> None:
     if args.what == "temperature":
         tbins = args.tbins
     else:
-        tbins = np.array([0, 4.5, 5.5, np.inf])
+        tbins = np.array(TEMPERATURE_REGIMES)
 
     # if only the core is to be shown, restrict radial range
-    if args.core_only and args.normalize:
-        ranges = np.array([[0, 0.05], [3, 8.5]])  # units: R_vir, log K
-    elif args.core_only and not args.normalize:
-        ranges = np.array([[0, 100], [3, 8.5]])  # units: kpc, log K
-    elif args.normalize:
-        ranges = np.array([[0, 2], [3, 8.5]])  # units: R_vir, log K
-    else:
-        ranges = np.array([[0, 2000], [3, 8.5]])  # units: kpc, log K
+    ranges = np.array(RANGES[(args.core_only, args.normalize)])
 
     pipeline_config.update(
         {
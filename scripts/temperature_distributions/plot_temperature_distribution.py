@@ -1,8 +1,11 @@
 import argparse
+import os
 import sys
 from pathlib import Path
 
-root_dir = Path(__file__).parents[2].resolve()
+import numpy as np
+
+root_dir = Path(os.path.abspath(__file__)).parents[2]
 sys.path.insert(0, str(root_dir / "src"))
 
 from library import scriptparse
@@ -14,6 +17,8 @@ from pipelines.temperature_distribution.histograms_temperatures import (
     TemperatureHistogramsPipeline,
 )
 
+MASS_BIN_EDGES = np.array([1e8, 1e9, 1e10, 1e11, 1e12, 1e13, 1e14, 1e15])
+
 
 def main(args: argparse.Namespace) -> None:
     """Create histograms of temperature distribution"""
@@ -57,7 +62,7 @@ def main(args: argparse.Namespace) -> None:
 
     pipeline_config.update(
         {
-            "mass_bin_edges": [1e8, 1e9, 1e10, 1e11, 1e12, 1e13, 1e14, 1e15],
+            "mass_bin_edges": MASS_BIN_EDGES,
             "n_temperature_bins": args.bins,
             "temperature_range": (-4.0, +4.0) if args.normalize else (3., 8.),
             "weights": weight_type,
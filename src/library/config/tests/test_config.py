@@ -15,6 +15,18 @@ else:
     mock_sim_home = Path().home() / ".simulation_test"
 
 
+@pytest.fixture(autouse=True)
+def clear_config_cache() -> None:
+    """Clear the config cache, so every test parses its mock config."""
+    config._CONFIG_CACHE.clear()
+    config._PATHS_CACHE.clear()
+    config.get_simulation_base_path.cache_clear()
+    yield
+    config._CONFIG_CACHE.clear()
+    config._PATHS_CACHE.clear()
+    config.get_simulation_base_path.cache_clear()
+
+
 @pytest.fixture
 def mock_sim_home_setup() -> None:
     """Set up the mock simulation home."""
@@ -44,7 +56,7 @@ def test_default_config_generic(mocker, mock_sim_home_setup):
                 "cool_gas_history_archive": {"TNG300-1": "default"},
             }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     test_cfg = config.get_default_config("TNG300-1")
     sim_path = mock_sim_home.resolve()
@@ -75,7 +87,7 @@ def test_default_config_default(mocker, mock_sim_home_setup):
                 "cool_gas_history_archive": {"TNG300-1": "default"}
             }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     test_cfg = config.get_default_config("TNG300-1")
     sim_path = mock_sim_home.resolve()
@@ -106,7 +118,7 @@ def test_custom_config(mocker, mock_sim_home_setup):
                 "cool_gas_history_archive": {"TNG50-2": "./my_dir/archive.hdf5"}
             }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     test_cfg = config.get_default_config(
         "TNG50-2", 50, "Group_M_Crit500", "Radius"
@@ -142,7 +154,7 @@ def test_custom_paths_linux(mocker, mock_sim_home_setup):
                 {"TNG300-1": str(mock_sim_home / "archive.hdf5")}
         }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     # create and test config
     test_cfg = config.get_default_config("TNG300-1")
@@ -173,7 +185,7 @@ def test_custom_paths_windows(mocker, mock_sim_home_setup):
             "cool_gas_history_archive": {"TNG300-1": str(mock_sim_home / "archive.hdf5")}
         }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     # create and test config
     test_cfg = config.get_default_config("TNG300-1")
@@ -203,7 +215,7 @@ def test_invalid_paths(mocker):
                 }
             }
     }
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     # create and test config
     with pytest.raises(config.InvalidConfigPathError) as e:
@@ -231,7 +243,7 @@ def test_invalid_simulation_name(mocker, mock_sim_home_setup):
             }
         }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     # create and test config
     with pytest.raises(config.InvalidSimulationNameError) as e:
@@ -262,9 +274,30 @@ def test_missing_simulation_in_archive_config(mocker, mock_sim_home_setup):
             }
         }
     }  # yapf: disable
-    mock_load = mocker.patch("yaml.full_load")
+    mock_load = mocker.patch("yaml.load")
     mock_load.return_value = mock_config
     # create and test config
     cfg = config.get_default_config("TNG300-1")
     # TNG300-1 is not in the config file, so the path is set to None
     assert cfg.cool_gas_history is None
+
+
+def test_config_file_parsed_once(mocker, mock_sim_home_setup):
+    """
+    Test that the config file is only parsed once while it is unchanged.
+    """
+    mock_config = {
+        "paths": {
+            "data_home": str(mock_sim_home),
+            "figures_home": str(mock_sim_home),
+            "base_paths": {"TNG300-1": str(mock_sim_home)},
+        }
+    }  # yapf: disable
+    mock_load = mocker.patch("yaml.load")
+    mock_load.return_value = mock_config
+    config.get_default_config("TNG300-1")
+    assert config.get_supported_simulations() == ["TNG300-1"]
+    assert config.get_simulation_base_path("TNG300-1") == str(
+        mock_sim_home.resolve()
+    )
+    mock_load.assert_called_once()
@@ -8,7 +8,6 @@ from typing import TYPE_CHECKING, Sequence
 
 import illustris_python as il
 import numpy as np
-import numpy.ma as ma
 
 from library import units
 from library.processing import selection
@@ -210,9 +209,7 @@ def select_halo_data_subset(
     logging.info("Selecting subset of halos for gallery.")
     select_ids = np.zeros((len(mass_bins) - 1) * 2 * min_select, dtype=int)
     for bin_num in range(len(mass_bins) - 1):
-        mask = np.where(mass_bin_mask == bin_num + 1, 1, 0)
-        masked_ids = ma.masked_array(halo_data["IDs"]).compress(mask)
-        masked_ids = masked_ids.compressed()
+        masked_ids = halo_data["IDs"][mass_bin_mask == bin_num + 1]
         n = 2 * min_select  # number of halos to select per bin
         # choose entries randomly
         rng = np.random.default_rng()
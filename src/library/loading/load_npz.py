@@ -0,0 +1,89 @@
+"""
+Tools to load arrays from numpy .npz archives.
+"""
+from __future__ import annotations
+
+import struct
+import zipfile
+from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from numpy.typing import NDArray
+
+
+def load_arrays_from_npz(
+    filepath: str | Path,
+    keys: list[str] | None = None,
+    mmap: bool = False,
+) -> dict[str, NDArray]:
+    """
+    Load the arrays of the given names from an .npz archive.
+
+    For archives written with ``np.savez`` (i.e. uncompressed), the
+    arrays are read directly from their offset in the archive file,
+    which avoids the overhead of ``ZipFile.open`` and the per-member
+    CRC check that ``np.load`` incurs. Compressed members are read the
+    regular way.
+
+    :param filepath: File name of the .npz archive.
+    :param keys: The names of the arrays to load. Optional, defaults
+        to None which means all arrays in the archive are loaded.
+    :param mmap: Whether to memory-map uncompressed members read-only
+        instead of reading them into memory. Compressed members cannot
+        be memory-mapped and are always read fully. Defaults to False.
+    :return: Mapping of array names to the loaded arrays.
+    """
+    arrays = {}
+    with open(filepath, "rb") as file, zipfile.ZipFile(file) as archive:
+        if keys is None:
+            keys = [name.removesuffix(".npy") for name in archive.namelist()]
+        for key in keys:
+            info = archive.getinfo(f"{key}.npy")
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[key] = np.lib.format.read_array(member)
+                continue
+            # skip the local file header (30 bytes plus variable length
+            # file name and extra field) to reach the raw .npy data
+            file.seek(info.header_offset)
+            header = file.read(30)
+            name_length, extra_length = struct.unpack("<HH", header[26:30])
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            if mmap:
+                arrays[key] = _memmap_npy_member(file, filepath)
+            else:
+                arrays[key] = np.lib.format.read_array(file)
+    return arrays
+
+
+def _memmap_npy_member(file: BinaryIO, filepath: str | Path) -> NDArray:
+    """
+    Memory-map the .npy data starting at the current position of ``file``.
+
+    :param file: Open file, positioned at the start of an .npy member.
+    :param filepath: Path of the file, required to create the memmap.
+    :raises ValueError: If the array holds Python objects, which can
+        neither be mapped nor loaded without pickling, as for ``np.load``.
+    :return: Read-only memory-mapped array.
+    """
+    start = file.tell()
+    version = np.lib.format.read_magic(file)
+    if version == (1, 0):
+        header = np.lib.format.read_array_header_1_0(file)
+    else:
+        header = np.lib.format.read_array_header_2_0(file)
+    shape, fortran_order, dtype = header
+    if dtype.hasobject:
+        file.seek(start)
+        return np.lib.format.read_array(file)
+    return np.memmap(
+        filepath,
+        dtype=dtype,
+        mode="r",
+        offset=file.tell(),
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
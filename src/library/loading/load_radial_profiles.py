@@ -3,16 +3,41 @@ Data loading for radial temperature profiles.
 """
 from __future__ import annotations
 
+import functools
 import logging
+import os
 import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import TYPE_CHECKING, Iterator
 
 import numpy as np
 
+from library.loading.load_npz import load_arrays_from_npz
+
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
+_NATSORT_PATTERN = re.compile(r"(\d+)")
+# number of data files loaded ahead of the consumer in the background
+_PREFETCH_WINDOW = 4
+# fields of the 1D profile files holding the histograms of flow rates
+_HIST_KEYS = (
+    "total_inflow",
+    "total_outflow",
+    "cool_inflow",
+    "cool_outflow",
+    "warm_inflow",
+    "warm_outflow",
+    "hot_inflow",
+    "hot_outflow",
+)
+# all fields of the 1D profile files
+_1D_PROFILE_KEYS = _HIST_KEYS + (
+    "edges", "halo_id", "halo_mass", "halo_position"
+)
+
 
 def _natsort_key(path: Path | str) -> list[int]:
     """
@@ -25,12 +50,111 @@ def _natsort_key(path: Path | str) -> list[int]:
     >>> sorted(alist, key=_natsort_key)
     ["file_1", "file_2", "file_10"]
 
-    :param path: A file path, as a valid Path object or string.
+    :param path: A file path, as a valid Path object or string. For
+        Path objects, only the file name is considered.
     :return: A list of integers found in the text.
     """
-    # yapf: disable
-    return [int(c) if c.isdigit() else c for c in re.split(r"(\d+)", str(path))]
-    # yapf: enable
+    name = path.name if isinstance(path, Path) else path
+    return [int(c) if c.isdigit() else c for c in _NATSORT_PATTERN.split(name)]
+
+
+def _split_halo_file_name(name: str) -> tuple[str, int, str]:
+    """
+    Split a file name of the form ``<prefix>_<halo ID>.<ext>``.
+
+    Cheaper alternative to ``_natsort_key`` for the common case of data
+    files named after the halo they belong to.
+
+    >>> _split_halo_file_name("profile_halo_10.npz")
+    ("profile_halo", 10, ".npz")
+
+    :param name: The file name.
+    :raises ValueError: When the file name does not end in an integer
+        halo ID followed by a file extension.
+    :return: The prefix, the halo ID and the extension (including the
+        dot) of the file name.
+    """
+    underscore, dot = name.rfind("_"), name.rfind(".")
+    if underscore < 0 or dot < underscore:
+        raise ValueError(f"File name {name} does not contain a halo ID.")
+    return name[:underscore], int(name[underscore + 1:dot]), name[dot:]
+
+
+def _list_data_files(directory: str | Path) -> list[os.DirEntry]:
+    """
+    Return the file entries of the given directory in natural order.
+
+    Uses ``os.scandir``, whose entries know their file type from the
+    directory listing itself, so no additional ``stat`` call is needed
+    per file. Non-file entries are skipped with a warning. If all files
+    are named ``<prefix>_<halo ID>.<ext>`` with the same prefix and
+    extension, they are sorted by halo ID directly, otherwise they are
+    sorted using ``_natsort_key``.
+
+    :param directory: Path of the directory to list.
+    :return: List of directory entries of all files in the directory,
+        sorted naturally by file name.
+    """
+    entries = []
+    with os.scandir(directory) as iterator:
+        for entry in iterator:
+            if entry.is_file():
+                entries.append(entry)
+            else:
+                logging.warning("Skipping non-file entry %s.", entry.path)
+    try:
+        parts = [_split_halo_file_name(entry.name) for entry in entries]
+    except ValueError:
+        parts = []
+    # sorting by halo ID only matches the natural order if the file
+    # names differ in nothing but the halo ID
+    if parts and len({(prefix, ext) for prefix, _, ext in parts}) == 1:
+        order = sorted(range(len(entries)), key=lambda i: parts[i][1])
+        return [entries[i] for i in order]
+    return sorted(entries, key=lambda entry: _natsort_key(entry.name))
+
+
+def _load_data_file(filepath: str, mmap: bool = False) -> dict[str, NDArray]:
+    """
+    Load all arrays from the given ``.npz`` file.
+
+    :param filepath: Path of the ``.npz`` file to load.
+    :param mmap: Whether to memory-map the arrays instead of reading
+        them into memory. Only possible for uncompressed archives;
+        compressed members are always read into memory.
+    :return: Dictionary of all arrays in the file, keyed by their name.
+    """
+    return load_arrays_from_npz(filepath, mmap=mmap)
+
+
+def _prefetch_data_files(
+    entries: list[os.DirEntry],
+    mmap: bool = False,
+    window: int = _PREFETCH_WINDOW,
+) -> Iterator[dict[str, NDArray]]:
+    """
+    Yield the contents of the given data files, loading ahead in threads.
+
+    Up to ``window`` files are read and decompressed in background
+    threads while the consumer processes the current file. Since zlib
+    and numpy release the GIL, this overlaps the file I/O with the
+    work done by the consumer. Results are yielded in the order of
+    ``entries``.
+
+    :param entries: The directory entries of the files to load.
+    :param mmap: Whether to memory-map the arrays instead of reading
+        them into memory.
+    :param window: Maximum number of files loaded ahead.
+    :yield: Dictionary of all arrays in the file, keyed by their name.
+    """
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending = deque()
+        for entry in entries:
+            pending.append(executor.submit(_load_data_file, entry.path, mmap))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def load_radial_profile_data(
@@ -56,74 +180,97 @@ def load_radial_profile_data(
         data, used for verification. Optional.
     :return: A tuple of arrays, with the first one being the histogram
         data, and the second the running averages for the histograms. If
-        loading or data verification fail, returns None instead.
+        loading or data verification fail, returns None instead. The
+        arrays are cached and shared between calls, and therefore
+        read-only.
     """
     logging.info("Loading saved radial temperature profiles from file.")
     if not isinstance(filepath, Path):
         filepath = Path(filepath)
 
     if not filepath.is_file():
-        logging.error(f"The given file {str(filepath)} is not a valid file.")
+        logging.error("The given file %s is not a valid file.", filepath)
         return
 
-    # load the file
-    with np.load(filepath) as data:
-        histograms = data["hist_mean"]
-        averages = data["running_avg"]
+    # load the file, or take it from cache if it is unchanged
+    histograms, averages = _load_radial_profile_file(
+        str(filepath.resolve()), filepath.stat().st_mtime_ns
+    )
 
-    if not n_radial_bins and not n_temperature_bins and not n_mass_bins:
+    expected = (n_mass_bins, n_temperature_bins, n_radial_bins)
+    if all(n is None for n in expected):
         logging.info("Returning loaded data wihout verification.")
         return histograms, averages
 
-    if n_mass_bins:
-        if histograms.shape[0] != n_mass_bins:
-            logging.error(
-                f"Histogram data does not have the expected length: expected "
-                f"{n_mass_bins} mass bins, but found {histograms.shape[0]} "
-                f"instead."
-            )
-            return
-        if averages.shape[0] != n_mass_bins:
-            logging.error(
-                f"Running averages do not have the expected length: expected "
-                f"{n_mass_bins} mass bins, but found {averages.shape[0]} "
-                f"instead."
-            )
-            return
-
-    if n_radial_bins:
-        if histograms.shape[2] != n_radial_bins:
-            logging.error(
-                f"Histogram data does not have the expected number of radial "
-                f"bins: expected {n_radial_bins} mass bins, but found "
-                f"{histograms.shape[2]} instead."
-            )
-            return
-        if averages.shape[1] != n_radial_bins:
-            logging.error(
-                f"Running averages do not have the expected number of radial "
-                f"bins: expected {n_radial_bins} mass bins, but found "
-                f"{averages.shape[1]} instead."
-            )
-            return
-
-    if n_temperature_bins:
-        if histograms.shape[1] != n_temperature_bins:
-            logging.error(
-                f"Histogram data does not have the expected number of "
-                f"temperature bins: expected {n_temperature_bins} mass bins, "
-                f"but found {histograms.shape[1]} instead."
-            )
-            return
+    # unspecified bin numbers are taken from the data, i.e. not verified
+    axes = ("mass", "temperature", "radial")
+    expected_hist = tuple(
+        actual if n is None else n
+        for n, actual in zip(expected, histograms.shape)
+    )
+    if histograms.shape != expected_hist:
+        axis = next(
+            i for i, (a, b) in enumerate(zip(histograms.shape, expected_hist))
+            if a != b
+        )
+        logging.error(
+            "Histogram data does not have the expected number of %s bins: "
+            "expected %s bins, but found %s instead.",
+            axes[axis],
+            expected_hist[axis],
+            histograms.shape[axis],
+        )
+        return
+    # running averages have no temperature axis
+    expected_avg = (
+        averages.shape[0] if n_mass_bins is None else n_mass_bins,
+        averages.shape[1] if n_radial_bins is None else n_radial_bins,
+    )
+    if averages.shape != expected_avg:
+        axis = 0 if averages.shape[0] != expected_avg[0] else 1
+        logging.error(
+            "Running averages do not have the expected number of %s bins: "
+            "expected %s bins, but found %s instead.",
+            axes[2 * axis],
+            expected_avg[axis],
+            averages.shape[axis],
+        )
+        return
 
     logging.info("Successfully loaded verified data.")
     return histograms, averages
 
 
+@functools.lru_cache(maxsize=64)
+def _load_radial_profile_file(
+    filepath: str, mtime_ns: int
+) -> tuple[NDArray, NDArray]:
+    """
+    Load the histograms and running averages from a radial profile file.
+
+    The result is cached by file path and modification time, so loading
+    the same unchanged file again does not read it again. To protect
+    the cached data, the returned arrays are read-only.
+
+    :param filepath: Resolved path of the numpy data file.
+    :param mtime_ns: Modification time of the file in nanoseconds. Only
+        used as part of the cache key.
+    :return: Tuple of the histograms and the running averages.
+    """
+    # memory-mapped, as the archive is uncompressed
+    data = load_arrays_from_npz(
+        filepath, ["hist_mean", "running_avg"], mmap=True
+    )
+    for array in data.values():
+        array.setflags(write=False)
+    return data["hist_mean"], data["running_avg"]
+
+
 def load_individuals_2d_profile(
     filepath: str | Path,
     expected_shape: tuple[int, int] | None = None,
     fail_fast: bool = False,
+    mmap: bool = False,
 ) -> Iterator[dict[str, NDArray] | None]:
     """
     Yield the histrogram data from file for every file in the directory.
@@ -143,6 +290,13 @@ def load_individuals_2d_profile(
         instead. False means the function will yield None and continue
         to iterate through the files, True means an invalid data shape
         will cause a ``StopIteration`` exception to be raised.
+    :param mmap: Whether to memory-map the arrays of every file instead
+        of reading them into memory, so that only the parts of the data
+        that are accessed are read from disk. Only effective for files
+        saved uncompressed (with ``np.savez``). Memory-mapped arrays are
+        read-only and keep their file open; consumers that hold on to
+        the data of many halos should copy it with ``np.array``.
+        Defaults to False.
     :raises StopIteration: Raised when a histogram shape does not match
         the expected shape while ``fail_fast`` is ``True``.
     :yield: A dictionary of the halo data including the radial profile
@@ -160,66 +314,49 @@ def load_individuals_2d_profile(
           data was saved, but typically, this is the virial mass (M_200).
           Note that this will be an NDArray of shape (1, ).
     """
-    if not isinstance(filepath, Path):
-        filepath = Path(filepath)
-
-    if not filepath.is_dir():
+    filepath = os.fspath(filepath)
+    if not os.path.isdir(filepath):
         logging.error(
-            "Expected data file directory, got file or simlink instead:\n"
-            f"{str(filepath)}"
+            "Expected data file directory, got file or simlink instead:\n%s",
+            filepath,
         )
 
     # load every file individually and yield it
-    files = list(filepath.iterdir())
-    files = sorted(files, key=_natsort_key)
-    for filename in files:
-        if not filename.is_file():
-            logging.warning(f"Skipping non-file entry {filename}.")
-        with np.load(filename) as data_file:
-            histogram = data_file["histogram"]
-            original_histogram = data_file["original_histogram"]
-            xedges = data_file["xedges"]
-            yedges = data_file["yedges"]
-            halo_id = data_file["halo_id"]
-            halo_mass = data_file["halo_mass"]
-            virial_temperature = data_file["virial_temperature"]
-
-        # construct dictionary
-        halo_data = {
-            "histogram": histogram,
-            "original_histogram": original_histogram,
-            "xedges": xedges,
-            "yedges": yedges,
-            "halo_id": halo_id,
-            "halo_mass": halo_mass,
-            "virial_temperature": virial_temperature,
-        }
-
-        # if data verification is undesired, yield data right away
-        if expected_shape is None:
-            yield halo_data
-            continue  # skip over all data verification code below
+    for data_file in _prefetch_data_files(_list_data_files(filepath), mmap):
+        histogram = data_file["histogram"]
 
-        # verify the data shape (is skipped for expected_shape = None)
-        if histogram.shape != expected_shape:
+        # verify the data shape first, before assembling the halo data
+        # (is skipped for expected_shape = None)
+        if expected_shape is not None and histogram.shape != expected_shape:
             logging.error(
-                f"Halo {halo_id} has histogram data not matching the expected "
-                f"shape: Expected shape {expected_shape} but got "
-                f"{histogram.shape} instead."
+                "Halo %s has histogram data not matching the expected shape: "
+                "Expected shape %s but got %s instead.",
+                data_file["halo_id"],
+                expected_shape,
+                histogram.shape,
             )
             if fail_fast:
                 raise StopIteration
-            else:
-                logging.warning("Yielding None. This may cause issues.")
-                yield None
-        else:
-            yield halo_data
+            logging.warning("Yielding None. This may cause issues.")
+            yield None
+            continue
+
+        yield {
+            "histogram": histogram,
+            "original_histogram": data_file["original_histogram"],
+            "xedges": data_file["xedges"],
+            "yedges": data_file["yedges"],
+            "halo_id": data_file["halo_id"],
+            "halo_mass": data_file["halo_mass"],
+            "virial_temperature": data_file["virial_temperature"],
+        }
 
 
 def load_individuals_1d_profile(
     filepath: str | Path,
     expected_shape: int | tuple[int] | None = None,
     fail_fast: bool = False,
+    mmap: bool = False,
 ) -> Iterator[dict[str, NDArray] | None]:
     """
     Yield the histogram data from file for every file in the directory.
@@ -243,6 +380,13 @@ def load_individuals_1d_profile(
         instead. False means the function will yield None and continue
         to iterate through the files, True means an invalid data shape
         will cause a ``StopIteration`` exception to be raised.
+    :param mmap: Whether to memory-map the arrays of every file instead
+        of reading them into memory, so that only the parts of the data
+        that are accessed are read from disk. Only effective for files
+        saved uncompressed (with ``np.savez``). Memory-mapped arrays are
+        read-only and keep their file open; consumers that hold on to
+        the data of many halos should copy it with ``np.array``.
+        Defaults to False.
     :raises StopIteration: Raised when a histogram shape does not match
         the expected shape while ``fail_fast`` is ``True``.
     :yield: A dictionary of the halo data including the radial profile
@@ -260,38 +404,19 @@ def load_individuals_1d_profile(
           data was saved, but typically, this is the virial mass (M_200).
           Note that this will be an NDArray of shape (1, ).
     """
-    if not isinstance(filepath, Path):
-        filepath = Path(filepath)
-
-    if not filepath.is_dir():
+    filepath = os.fspath(filepath)
+    if not os.path.isdir(filepath):
         logging.error(
-            "Expected data file directory, got file or simlink instead:\n"
-            f"{str(filepath)}"
+            "Expected data file directory, got file or simlink instead:\n%s",
+            filepath,
         )
 
+    if isinstance(expected_shape, int):
+        expected_shape = (expected_shape, )
+
     # load every file individually and yield it
-    files = list(filepath.iterdir())
-    files = sorted(files, key=_natsort_key)
-    for filename in files:
-        if not filename.is_file():
-            logging.warning(f"Skipping non-file entry {filename}.")
-            continue
-        with np.load(filename) as data_file:
-            # construct dictionary
-            halo_data = {
-                "total_inflow": data_file["total_inflow"],
-                "total_outflow": data_file["total_outflow"],
-                "cool_inflow": data_file["cool_inflow"],
-                "cool_outflow": data_file["cool_outflow"],
-                "warm_inflow": data_file["warm_inflow"],
-                "warm_outflow": data_file["warm_outflow"],
-                "hot_inflow": data_file["hot_inflow"],
-                "hot_outflow": data_file["hot_outflow"],
-                "edges": data_file["edges"],
-                "halo_id": data_file["halo_id"],
-                "halo_mass": data_file["halo_mass"],
-                "halo_position": data_file["halo_position"],
-            }
+    for data_file in _prefetch_data_files(_list_data_files(filepath), mmap):
+        halo_data = {key: data_file[key] for key in _1D_PROFILE_KEYS}
 
         # if data verification is undesired, yield data right away
         if expected_shape is None:
@@ -299,17 +424,16 @@ def load_individuals_1d_profile(
             continue  # skip over all data verification code below
 
         # verify the data shape (is skipped for expected_shape = None)
-        if isinstance(expected_shape, int):
-            expected_shape = (expected_shape, )
         any_failures = False
-        for field, hist in halo_data.items():
-            if field in ["edges", "halo_id", "halo_mass", "halo_position"]:
-                continue
-            if (s := hist.shape) != expected_shape:
+        for field in _HIST_KEYS:
+            if (s := halo_data[field].shape) != expected_shape:
                 logging.error(
-                    f"Halo {halo_data['halo_id']} has {field} data not "
-                    f"matching the expected shape: Expected shape "
-                    f"{expected_shape} but got {s} instead."
+                    "Halo %s has %s data not matching the expected shape: "
+                    "Expected shape %s but got %s instead.",
+                    halo_data["halo_id"],
+                    field,
+                    expected_shape,
+                    s,
                 )
                 if fail_fast:
                     raise StopIteration  # fail immediately
@@ -322,3 +446,68 @@ def load_individuals_1d_profile(
             yield None
         else:
             yield halo_data
+
+
+def load_all_1d_profiles(filepath: str | Path) -> dict[str, NDArray] | None:
+    """
+    Return the 1D profile data of all halos in the directory at once.
+
+    Unlike ``load_individuals_1d_profile``, which yields the data of one
+    halo at a time, this function loads the data of all halos into
+    arrays with the halos along the first axis, ordered naturally by
+    file name (i.e. by halo ID). This allows processing the profiles of
+    all halos with vectorized numpy operations. All files must contain
+    histograms of the same shape.
+
+    :param filepath: Path of the directory in which the data files are
+        located. All non-file entries are ignored.
+    :return: A dictionary with the following keys, or None if the
+        directory holds no data files or the data shapes do not match:
+
+        - The eight histogram fields ``total_inflow``, ``total_outflow``,
+          ``cool_inflow``, ``cool_outflow``, ``warm_inflow``,
+          ``warm_outflow``, ``hot_inflow`` and ``hot_outflow``: Arrays
+          of shape (N, B) for N halos and B bins.
+        - ``edges``: The bin edges of the histograms, as taken from the
+          first file. Shape (B + 1, ).
+        - ``halo_id``: The IDs of the halos. Shape (N, ).
+        - ``halo_mass``: The masses of the halos in units of solar
+          masses. Shape (N, ).
+        - ``halo_position``: The positions of the halos. Shape (N, 3).
+    """
+    entries = _list_data_files(filepath)
+    n_halos = len(entries)
+    if n_halos == 0:
+        logging.error("Found no data files in %s.", filepath)
+        return
+
+    profiles = {}
+    for i, data_file in enumerate(_prefetch_data_files(entries)):
+        if i == 0:
+            # allocate memory, using the first file as template
+            profiles["edges"] = data_file["edges"]
+            for key in _1D_PROFILE_KEYS:
+                if key == "edges":
+                    continue
+                shape = data_file[key].shape
+                if key in ["halo_id", "halo_mass"]:
+                    shape = ()  # stored as arrays of shape (1, )
+                profiles[key] = np.empty(
+                    (n_halos, ) + shape, dtype=data_file[key].dtype
+                )
+        for key in _1D_PROFILE_KEYS:
+            if key == "edges":
+                continue
+            target = profiles[key]
+            if data_file[key].size != target[i].size:
+                logging.error(
+                    "Halo %s has %s data not matching the shape of the other "
+                    "halos: Expected shape %s but got %s instead.",
+                    data_file["halo_id"],
+                    key,
+                    target.shape[1:],
+                    data_file[key].shape,
+                )
+                return
+            target[i] = data_file[key].reshape(target.shape[1:])
+    return profiles
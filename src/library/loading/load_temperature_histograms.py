@@ -9,6 +9,8 @@ from typing import TYPE_CHECKING
 
 import numpy as np
 
+from library.loading.load_npz import load_arrays_from_npz
+
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
@@ -20,9 +22,15 @@ def load_histogram_data(
     """
     Load stacked (averaged) histogram data from file.
 
-    The file needs to be a numpy .npz archive, as saved by the method
-    ``_post_process_data``. The resulting NpzFile instance must have
-    keys 'hist_mean', 'hist_median' and 'hist_percentiles'. For all
+    The data is loaded from one .npy file per array, named after the
+    stem of ``filepath`` with the array name appended (e.g.
+    ``<stem>_hist_mean.npy``), as saved by the temperature histogram
+    pipeline. These files are memory-mapped. If they do not exist, the
+    function falls back to loading the numpy .npz archive ``filepath``
+    itself, as written by earlier versions of the pipeline.
+
+    The arrays must be named 'hist_mean', 'hist_median',
+    'hist_percentiles' and 'halos_per_bin'. For all
     three arrays, the first axis must match in length the number of
     mass bins and the second axis must match the number of histogram
     bins ``self.len_data``.
@@ -31,28 +39,40 @@ def load_histogram_data(
     ``histograms_median`` and ``histograms_percentiles`` attributes
     respectively.
 
-    :param filepath: file name of the numpy data file.
+    :param filepath: file name of the numpy .npz data file. The .npy
+        files are looked up next to it.
     :param expected_shape: The shape that the mean and median arrays
         are expected to have. If given, the function will verify that
         the loaded data has this shape, otherwise the loaded data will
         be returned unchecked.
     :return: Tuple of the histogram mean, median and percentiles, in
-        that order.
+        that order. Arrays stored uncompressed are memory-mapped
+        read-only, so only the mass bins accessed are read from disk.
     """
     logging.info("Loading saved histogram data from file.")
     if not isinstance(filepath, Path):
         filepath = Path(filepath)
 
-    if not filepath.is_file():
+    # attempt to load the data
+    keys = ["hist_mean", "hist_median", "hist_percentiles", "halos_per_bin"]
+    npy_files = {
+        key: filepath.with_name(f"{filepath.stem}_{key}.npy")
+        for key in keys
+    }
+    if all(npy_file.is_file() for npy_file in npy_files.values()):
+        hist_data = {
+            key: np.load(npy_file, mmap_mode="r")
+            for key, npy_file in npy_files.items()
+        }
+    elif filepath.is_file():
+        hist_data = load_arrays_from_npz(filepath, keys, mmap=True)
+    else:
         logging.error(f"The given file {str(filepath)} is not a valid file.")
         return
-
-    # attempt to load the data
-    with np.load(filepath) as hist_data:
-        hist_mean = hist_data["hist_mean"]
-        hist_median = hist_data["hist_median"]
-        hist_perc = hist_data["hist_percentiles"]
-        halos_per_bin = hist_data["halos_per_bin"]
+    hist_mean = hist_data["hist_mean"]
+    hist_median = hist_data["hist_median"]
+    hist_perc = hist_data["hist_percentiles"]
+    halos_per_bin = hist_data["halos_per_bin"]
 
     if not expected_shape:
         # no verificatin of data
@@ -110,8 +130,9 @@ def load_virial_temperatures(filepath: str | Path) -> NDArray | None:
         logging.error(f"The given file {str(filepath)} is not a valid file.")
         return
 
-    # attempt to load the data
-    virial_temperatures = np.load(filepath)
+    # attempt to load the data; memory-mapped, since only the entries of
+    # individual mass bins are ever accessed
+    virial_temperatures = np.load(filepath, mmap_mode="r")
     logging.info("Successfully loaded virial temperatures.")
     return virial_temperatures
 
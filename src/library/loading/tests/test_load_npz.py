@@ -0,0 +1,101 @@
+"""Tests for the npz loading module"""
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pytest_subtests import SubTests
+
+from library.loading import load_npz
+
+ARRAYS = {
+    "floats": np.linspace(0, 1, 12).reshape(3, 4),
+    "fortran": np.asfortranarray(np.arange(12, dtype=np.int32).reshape(3, 4)),
+    "scalar": np.array(3.5),
+    "empty": np.empty((0, 3)),
+    "strings": np.array(["a", "bc"]),
+}
+
+
+def _write_archives(directory: Path) -> dict[str, Path]:
+    """Write the test arrays to a plain and a compressed archive"""
+    archives = {
+        "savez": directory / "plain.npz",
+        "savez_compressed": directory / "compressed.npz",
+    }
+    np.savez(archives["savez"], **ARRAYS)
+    np.savez_compressed(archives["savez_compressed"], **ARRAYS)
+    return archives
+
+
+def test_load_arrays_from_npz_matches_np_load(
+    tmp_path: Path, subtests: SubTests
+) -> None:
+    """Test that all arrays are loaded as np.load loads them"""
+    for writer, archive in _write_archives(tmp_path).items():
+        for mmap in [False, True]:
+            with subtests.test(msg=f"{writer}, mmap {mmap}"):
+                output = load_npz.load_arrays_from_npz(archive, mmap=mmap)
+                with np.load(archive) as expected:
+                    assert set(output.keys()) == set(expected.keys())
+                    for key, value in expected.items():
+                        assert output[key].dtype == value.dtype
+                        assert output[key].shape == value.shape
+                        np.testing.assert_array_equal(output[key], value)
+
+
+def test_load_arrays_from_npz_memory_order(tmp_path: Path) -> None:
+    """Test that Fortran-ordered arrays keep their memory order"""
+    archive = _write_archives(tmp_path)["savez"]
+    for mmap in [False, True]:
+        output = load_npz.load_arrays_from_npz(archive, mmap=mmap)
+        assert output["fortran"].flags.f_contiguous
+        assert not output["fortran"].flags.c_contiguous
+        assert output["floats"].flags.c_contiguous
+
+
+def test_load_arrays_from_npz_mmap(tmp_path: Path) -> None:
+    """Test that only uncompressed members are memory-mapped"""
+    archives = _write_archives(tmp_path)
+    output = load_npz.load_arrays_from_npz(archives["savez"], mmap=True)
+    assert isinstance(output["floats"], np.memmap)
+    assert not output["floats"].flags.writeable
+    output = load_npz.load_arrays_from_npz(
+        archives["savez_compressed"], mmap=True
+    )
+    assert not isinstance(output["floats"], np.memmap)
+    output = load_npz.load_arrays_from_npz(archives["savez"], mmap=False)
+    assert not isinstance(output["floats"], np.memmap)
+    assert output["floats"].flags.writeable
+
+
+def test_load_arrays_from_npz_subset_of_keys(
+    tmp_path: Path, subtests: SubTests
+) -> None:
+    """Test that only the requested arrays are loaded"""
+    for writer, archive in _write_archives(tmp_path).items():
+        with subtests.test(msg=writer):
+            output = load_npz.load_arrays_from_npz(
+                archive, ["scalar", "empty"]
+            )
+            assert list(output.keys()) == ["scalar", "empty"]
+            np.testing.assert_array_equal(output["scalar"], ARRAYS["scalar"])
+            assert output["empty"].shape == (0, 3)
+
+
+def test_load_arrays_from_npz_missing_key(tmp_path: Path) -> None:
+    """Test that requesting a missing array raises an error"""
+    archive = _write_archives(tmp_path)["savez"]
+    with pytest.raises(KeyError):
+        load_npz.load_arrays_from_npz(archive, ["missing"])
+
+
+def test_load_arrays_from_npz_refuses_object_arrays(
+    tmp_path: Path, subtests: SubTests
+) -> None:
+    """Test that object arrays are refused like np.load does"""
+    archive = tmp_path / "objects.npz"
+    np.savez(archive, objects=np.array([{"a": 1}], dtype=object))
+    for mmap in [False, True]:
+        with subtests.test(msg=f"mmap {mmap}"):
+            with pytest.raises(ValueError):
+                load_npz.load_arrays_from_npz(archive, mmap=mmap)
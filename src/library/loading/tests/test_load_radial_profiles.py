@@ -0,0 +1,99 @@
+"""Tests for the radial profile loading module"""
+from pathlib import Path
+
+import numpy as np
+
+from library.loading import load_radial_profiles
+
+HIST_KEYS = (
+    "total_inflow",
+    "total_outflow",
+    "cool_inflow",
+    "cool_outflow",
+    "warm_inflow",
+    "warm_outflow",
+    "hot_inflow",
+    "hot_outflow",
+)
+
+
+def _write_profile(directory: Path, halo_id: int, n_bins: int = 5) -> None:
+    """Write a 1D profile file as the individual profile pipeline does"""
+    histograms = {
+        key: np.full(n_bins, halo_id + i, dtype=float)
+        for i, key in enumerate(HIST_KEYS)
+    }
+    np.savez(
+        directory / f"density_profile_{halo_id}.npz",
+        edges=np.linspace(0, 2, n_bins + 1),
+        halo_id=np.array([halo_id]),
+        halo_mass=np.array([1e14 * halo_id]),
+        halo_position=np.array([halo_id, 0., 1.]),
+        **histograms,
+    )
+
+
+def test_load_all_1d_profiles(tmp_path: Path) -> None:
+    """Test shapes and halo order of the loaded profiles"""
+    halo_ids = [10, 2, 33]
+    for halo_id in halo_ids:
+        _write_profile(tmp_path, halo_id)
+
+    output = load_radial_profiles.load_all_1d_profiles(tmp_path)
+
+    expected_ids = np.array([2, 10, 33])
+    np.testing.assert_array_equal(output["halo_id"], expected_ids)
+    np.testing.assert_array_equal(output["halo_mass"], 1e14 * expected_ids)
+    assert output["halo_position"].shape == (3, 3)
+    np.testing.assert_array_equal(output["halo_position"][:, 0], expected_ids)
+    np.testing.assert_array_equal(output["edges"], np.linspace(0, 2, 6))
+    for i, key in enumerate(HIST_KEYS):
+        assert output[key].shape == (3, 5)
+        np.testing.assert_array_equal(
+            output[key], np.repeat(expected_ids[:, None] + i, 5, axis=1)
+        )
+
+
+def test_load_all_1d_profiles_empty_directory(tmp_path: Path) -> None:
+    """Test that an empty directory returns None"""
+    assert load_radial_profiles.load_all_1d_profiles(tmp_path) is None
+
+
+def test_load_all_1d_profiles_mismatched_bins(tmp_path: Path) -> None:
+    """Test that profiles with different numbers of bins return None"""
+    _write_profile(tmp_path, 1, n_bins=5)
+    _write_profile(tmp_path, 2, n_bins=6)
+    assert load_radial_profiles.load_all_1d_profiles(tmp_path) is None
+
+
+def test_list_data_files_sorts_by_halo_id(tmp_path: Path) -> None:
+    """Test that files of the same prefix are sorted by halo ID"""
+    for halo_id in [2, 10, 1]:
+        (tmp_path / f"profile_halo_{halo_id}.npz").touch()
+    output = load_radial_profiles._list_data_files(tmp_path)
+    expected = [
+        "profile_halo_1.npz",
+        "profile_halo_2.npz",
+        "profile_halo_10.npz",
+    ]
+    assert [entry.name for entry in output] == expected
+
+
+def test_list_data_files_mixed_prefixes(tmp_path: Path) -> None:
+    """Test that files of different prefixes are sorted naturally"""
+    names = [
+        "profile_halo_2.npz",
+        "profile_halo_10.npz",
+        "foo_1.npz",
+        "profile_halo_1.npz",
+    ]
+    for name in names:
+        (tmp_path / name).touch()
+    output = load_radial_profiles._list_data_files(tmp_path)
+    expected = [
+        "foo_1.npz",
+        "profile_halo_1.npz",
+        "profile_halo_2.npz",
+        "profile_halo_10.npz",
+    ]
+    assert [entry.name for entry in output] == expected
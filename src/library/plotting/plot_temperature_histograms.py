@@ -8,7 +8,6 @@ from typing import TYPE_CHECKING, Sequence
 
 import matplotlib.pyplot as plt
 import numpy as np
-import numpy.ma as ma
 
 from library.plotting import colormaps, common
 
@@ -182,7 +181,7 @@ def overplot_virial_temperatures(
         halos in the simulation.
     :param mass_bin_index: Mass bin index, starting from zero.
     :param mass_bin_mask: A mass bin mask as returned by
-        :func:`statistics.sort_masses_into_bins`, that is an array of
+        :func:`numpy.digitize`, that is an array of
         bin numbers into which the halo of the corresponding array index
         falls. Note that mass bin numbers start at 1, not 0.
     :param color: The color to use for the overplot. Must be a matplotlib
@@ -194,10 +193,8 @@ def overplot_virial_temperatures(
     :return: Tuple of figure and axes, updated for overplot.
     """
     # find virial temperatures, only for current bin
-    mask = np.where(mass_bin_mask == mass_bin_index + 1, 1, 0)
-    virial_temperatures = (
-        ma.masked_array(virial_temperatures).compress(mask, axis=0)
-    )
+    in_bin = mass_bin_mask == mass_bin_index + 1
+    virial_temperatures = virial_temperatures[in_bin]
 
     # find min and max as well as the average temperature
     min_temp = np.min(virial_temperatures)
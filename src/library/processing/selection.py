@@ -4,7 +4,7 @@ Tools to select data entries from a larger data set.
 from __future__ import annotations
 
 import logging
-from typing import TYPE_CHECKING, Iterator, Literal
+from typing import TYPE_CHECKING, Literal
 
 import numpy as np
 import numpy.ma as ma
@@ -12,6 +12,12 @@ import numpy.ma as ma
 if TYPE_CHECKING:
     from numpy.typing import NDArray
 
+# maximum ratio of value range to array size for a lookup table
+_MAX_LOOKUP_TABLE_RATIO = 4
+# default mass bins for clusters: 0.2 dex from log M = 14 to log M = 15.4
+_DEFAULT_CLUSTER_MASS_BINS = 10**np.linspace(14.0, 15.4, num=8)
+_DEFAULT_CLUSTER_MASS_BINS.flags.writeable = False
+
 
 def digitize_clusters(
     cluster_masses: NDArray,
@@ -42,19 +48,20 @@ def digitize_clusters(
 
     :param cluster_masses: Array of the cluster masses in units of solar
         masses.
-    :param bins: Array of mass bin edges in units of solar masses.
-        Optional, defaults to seven 0.2 dex mass bins from log M = 14 to
-        log M = 15.4 when left empty or set to None.
+    :param bins: Array of monotonically increasing mass bin edges in
+        units of solar masses. Optional, defaults to seven 0.2 dex mass
+        bins from log M = 14 to log M = 15.4 when left empty or set to
+        None.
     :return: An array of bin indices into which the masses fall, with
         the masses that fall to the right of the last bin edge being
         sorted into the last bin instead.
     """
     if bins is None:
-        bins = 10**np.linspace(14.0, 15.4, num=8)
-    mask = np.digitize(cluster_masses, bins)
+        bins = _DEFAULT_CLUSTER_MASS_BINS
+    # equivalent to np.digitize for increasing bins, without its checks
+    mask = np.searchsorted(bins, cluster_masses, side="right")
     # replace index of "outside of bins" with last bin index
-    mask[mask == len(bins)] -= 1
-    return mask
+    return np.minimum(mask, len(bins) - 1)
 
 
 def select_halos_from_mass_bins(
@@ -86,9 +93,7 @@ def select_halos_from_mass_bins(
     logging.info("Selecting subset of halos for gallery.")
     selected_halo_ids = np.zeros(n_mass_bins * selections_per_bin, dtype=int)
     for bin_num in range(n_mass_bins):
-        mask = np.where(mass_bin_mask == bin_num + 1, 1, 0)
-        masked_indices = ma.masked_array(halo_ids).compress(mask)
-        masked_indices = masked_indices.compressed()
+        masked_indices = halo_ids[mass_bin_mask == bin_num + 1]
         # choose entries randomly
         rng = np.random.default_rng()
         low_edge = bin_num * selections_per_bin
@@ -103,15 +108,16 @@ def bin_quantity(
     quantity: NDArray,
     bin_mask: NDArray,
     n_bins: int = -1,
-) -> Iterator[NDArray]:
+) -> list[NDArray]:
     """
     Sort ``quantity`` into mass bins according to ``bin_mask``.
 
-    Function is a generator that will yield, for every mass bin given
-    by ``bin_mask``, all entries in ``quantity`` that fall into the
-    current bin. It will start by yielding the first bin, given by the
-    index 1 in the bin mask, and continue until the last bin present
-    in the bin mask.
+    Function returns, for every mass bin given by ``bin_mask``, all
+    entries in ``quantity`` that fall into the bin. The list starts
+    with the first bin, given by the index 1 in the bin mask, and
+    continues until the last bin present in the bin mask. The entries
+    of all bins are views into a single copy of ``quantity``, sorted
+    by bin.
 
     :param quantity: The array of quantities to bin. Must have shape
         (N, S) where S can be any arbitrary shape. The array will be
@@ -129,17 +135,45 @@ def bin_quantity(
         Optional, defaults to -1 which means the number of bins will be
         determined from the mask by taking the highest index in it as
         the number of bins.
-    :return: A generator object that will yield arrays of shape (M, S).
-        M is the number of entries inside the n-th bin. The generator
-        will go through the bins in order, starting from bin index 1.
+    :return: A list of arrays of shape (M, S), where M is the number of
+        entries inside the n-th bin. The bins are in order, starting from
+        bin index 1.
     """
     if n_bins == -1:
         n_bins = np.max(bin_mask)
-    for bin_num in range(n_bins):
-        mask = np.where(bin_mask == bin_num + 1, 1, 0)
-        masked_indices = ma.masked_array(quantity).compress(mask)
-        masked_indices = masked_indices.compressed()
-        yield masked_indices
+    order, starts = argsort_bins(bin_mask, n_bins)
+    sorted_quantity = quantity[order]
+    return [
+        sorted_quantity[starts[bin_num]:starts[bin_num + 1]]
+        for bin_num in range(n_bins)
+    ]
+
+
+def argsort_bins(bin_mask: NDArray, n_bins: int) -> tuple[NDArray, NDArray]:
+    """
+    Return the indices that sort ``bin_mask`` and the bin boundaries.
+
+    Sorting a quantity by the returned order places all entries of the
+    same bin next to each other, such that the entries of every bin form
+    a contiguous slice. The returned boundaries give the start of these
+    slices: the entries of bin ``i`` (with mask index ``i + 1``) are
+    ``quantity[order][starts[i]:starts[i + 1]]``. This way, the bin mask
+    has to be sorted only once, instead of comparing it against every
+    bin index in turn.
+
+    :param bin_mask: A mask assigning every entry of a quantity to a bin.
+        Must be an array of integers of shape (N, ). Can be obtained for
+        example from ``numpy.digitize``.
+    :param n_bins: The number of bins, starting from mask index 1. All
+        entries with mask indices outside of the range from 1 to
+        ``n_bins`` do not belong to any of the slices.
+    :return: A tuple of the sorting indices of shape (N, ) and the start
+        indices of the bins of shape (``n_bins`` + 1, ), where the last
+        entry is the end of the last bin.
+    """
+    order = np.argsort(bin_mask, kind="stable")
+    starts = np.searchsorted(bin_mask[order], np.arange(1, n_bins + 2))
+    return order, starts
 
 
 def mask_quantity(
@@ -179,14 +213,10 @@ def mask_quantity(
         numpy array before returning. Defaults to True.
     :return: The masked quantity array.
     """
-    mask = np.where(mask == index, 1, 0)
-    masked_indices = ma.masked_array(quantity).compress(mask, axis=0)
+    selected = quantity[mask == index]
     if not compress:
-        return masked_indices
-    masked_indices = masked_indices.compressed()
-    if len(quantity.shape) > 1:
-        masked_indices = masked_indices.reshape(-1, *quantity.shape[1:])
-    return masked_indices
+        return ma.masked_array(selected)
+    return selected
 
 
 def mask_data_dict(
@@ -441,11 +471,11 @@ def select_if_in(
     # here as we will need to repeat them later anyhow and mode `detect`
     # issues no warnings.
     if warn_if_not_unique:
-        if len(np.unique(a.copy())) != len(a):
+        if len(np.unique(a)) != len(a):
             logging.warning("`select_if_in`: `a` contains duplicate entries!")
 
     if warn_if_not_subset:
-        if len(np.intersect1d(a, s)) < len(np.unique(s)):
+        if not np.all(np.isin(s, a)):
             logging.warning("`select_if_in`: `s` is not a subset of `a`!")
 
     # find indices
@@ -455,6 +485,9 @@ def select_if_in(
             a_sorted_indices = np.argsort(a)
             indices = np.searchsorted(a[a_sorted_indices], s)
             return a_sorted_indices[indices]
+        elif _is_compact_integer_range(a, s):
+            # integer IDs from a compact range can be looked up directly
+            return _select_by_lookup_table(a, s)
         else:
             # `s` is not a subset of `a`, must mask invalid indices
             a_sorted_indices = np.argsort(a)
@@ -465,11 +498,104 @@ def select_if_in(
             )
             return selected_indices[a[selected_indices] == s]
     elif mode == "iterate":
-        return np.nonzero(np.isin(a, s, assume_unique=assume_unique))[0]
+        return np.flatnonzero(np.isin(a, s, assume_unique=assume_unique))
     elif mode == "intersect":
+        if _is_compact_integer_range(a, s):
+            return _intersect_by_lookup_table(a, s)
         return np.intersect1d(
             a, s, assume_unique=assume_unique, return_indices=True
         )[1]
     else:
         logging.error(f"Unsupported mode {mode} for `selection.select_if_in`.")
         return np.array([np.nan])
+
+
+def _is_compact_integer_range(a: NDArray, s: NDArray) -> bool:
+    """
+    Return whether ``a`` holds integers from a sufficiently compact range.
+
+    :param a: The array of values which is to be indexed.
+    :param s: The array of values for which to search for in ``a``.
+    :return: True if ``a`` and ``s`` are integer arrays and the range of
+        values in ``a`` is at most ``_MAX_LOOKUP_TABLE_RATIO`` times as
+        large as ``a`` itself, such that a lookup table over this range
+        is cheap to build. False otherwise.
+    """
+    if not (
+        np.issubdtype(a.dtype, np.signedinteger)
+        and np.issubdtype(s.dtype, np.signedinteger) and a.ndim == 1
+        and a.size > 0
+    ):
+        return False
+    value_range = int(a.max()) - int(a.min()) + 1
+    return value_range <= _MAX_LOOKUP_TABLE_RATIO * a.size
+
+
+def _select_by_lookup_table(a: NDArray, s: NDArray) -> NDArray:
+    """
+    Return indices of entries in ``a`` that are in ``s`` via a lookup table.
+
+    Equivalent to mode ``searchsort`` of :func:`select_if_in`, but every
+    value of ``s`` is found in constant time by using it as index into a
+    table that holds, for every value in the range of ``a``, its index in
+    ``a``. If ``a`` contains duplicate values, the index of their first
+    occurrence is used.
+
+    :param a: The array of integer values which is to be indexed. Must
+        be 1D and not empty.
+    :param s: The array of integer values for which to search for in
+        ``a``.
+    :return: The indices into ``a`` in the order of the values in ``s``.
+        Values of ``s`` that are not in ``a`` are omitted.
+    """
+    table, offsets = _lookup_table_offsets(a, s)
+    indices = table[offsets]
+    return indices[indices >= 0]
+
+
+def _intersect_by_lookup_table(a: NDArray, s: NDArray) -> NDArray:
+    """
+    Return indices of entries in ``a`` that are in ``s`` via a lookup table.
+
+    Equivalent to mode ``intersect`` of :func:`select_if_in`, but instead
+    of sorting ``a`` and ``s``, the values of ``s`` are marked in a table
+    spanning the range of values of ``a``. Walking this table in order
+    yields the indices into ``a`` sorted by value. If ``a`` contains
+    duplicate values, the index of their first occurrence is used.
+
+    :param a: The array of integer values which is to be indexed. Must
+        be 1D and not empty.
+    :param s: The array of integer values for which to search for in
+        ``a``.
+    :return: The indices into ``a`` of the values that are also in ``s``,
+        ordered such that ``a[indices]`` is sorted.
+    """
+    table, offsets = _lookup_table_offsets(a, s)
+    in_s = np.zeros(len(table), dtype=np.bool_)
+    in_s[offsets] = True
+    in_s &= table >= 0
+    return table[in_s]
+
+
+def _lookup_table_offsets(a: NDArray, s: NDArray) -> tuple[NDArray, NDArray]:
+    """
+    Return a table of indices into ``a`` and the positions of ``s`` in it.
+
+    The table holds, for every integer in the range of values of ``a``,
+    the index of the first occurrence of this value in ``a``, or -1 if
+    the value is not in ``a``.
+
+    :param a: The array of integer values which is to be indexed. Must
+        be 1D and not empty.
+    :param s: The array of integer values for which to search for in
+        ``a``.
+    :return: The lookup table, and the positions of all values of ``s``
+        within the range of ``a`` in the table, in the order of ``s``.
+    """
+    a_min = a.min()
+    table = np.full(int(a.max()) - int(a_min) + 1, -1, dtype=np.intp)
+    # assign in reverse so that the first of duplicate values is kept
+    table[a[::-1] - a_min] = np.arange(a.size - 1, -1, -1)
+    offsets = s - a_min
+    in_range = (offsets >= 0) & (offsets < len(table))
+    return table, offsets[in_range]
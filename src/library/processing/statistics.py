@@ -4,7 +4,7 @@ Tools for statistics with temperature and gas cell data.
 from __future__ import annotations
 
 import logging
-from typing import Literal, Sequence, TypeVar
+from typing import Any, Literal, Sequence, TypeVar
 
 import numpy as np
 import scipy.stats
@@ -14,6 +14,8 @@ from library.processing import selection
 
 Hist2D = TypeVar("Hist2D", bound=NDArray)
 
+_HISTOGRAM_BLOCK_SIZE = 65536  # entries binned at once, as in np.histogram
+
 
 def nanpercentiles(a: NDArray, axis: int):
     """
@@ -37,6 +39,33 @@ def nanpercentiles(a: NDArray, axis: int):
     return np.nanpercentile(a, np.array([16, 84]), axis=axis)
 
 
+def _nanpercentile_by_row(a: NDArray, q: Sequence[float]) -> NDArray:
+    """
+    Return ``np.nanpercentile(a, q, axis=0)``, avoiding its slow path.
+
+    ``np.nanpercentile`` processes every column separately when the
+    array contains NaN values. If NaN values occur only as entire rows
+    of ``a`` (such as invalid histograms filled with NaN), these rows
+    are dropped instead and the percentiles are computed on all columns
+    at once with ``np.percentile``, which partitions the data rather
+    than sorting it. For all other arrays, ``np.nanpercentile`` is used.
+
+    :param a: Array of shape (N, ...). Percentiles are taken along the
+        first axis.
+    :param q: Sequence of percentiles to compute.
+    :return: Array of shape (len(q), ...) of the percentiles. If ``a``
+        is empty, the percentiles are NaN.
+    """
+    if len(a) == 0:
+        return np.full((len(q), ) + a.shape[1:], np.nan)
+    nan_mask = np.isnan(a).reshape(len(a), -1)
+    nan_rows = np.all(nan_mask, axis=1)
+    partial_nan_rows = np.any(nan_mask, axis=1) & ~nan_rows
+    if np.all(nan_rows) or np.any(partial_nan_rows):
+        return np.nanpercentile(a, q, axis=0)
+    return np.percentile(a[~nan_rows], q, axis=0)
+
+
 def stack_histograms(
     histograms: NDArray | Sequence[NDArray],
     method: Literal["median", "mean"],
@@ -119,7 +148,7 @@ def stack_histograms_per_mass_bin(
     :param n_mass_bins: The number of mass bins.
     :param mass_bin_mask: A mask asigning every histogram in ``histograms``
         to a mass bin. This can be obtained from
-        :func:``sort_masses_into_bins`. Every entry must be a number,
+        :func:`numpy.digitize`. Every entry must be a number,
         assigning the corresponding histogram of the same array index to
         a mass bin.
    :return: A tuple of NDArrays, with the first being an array of shape
@@ -143,19 +172,23 @@ def stack_histograms_per_mass_bin(
     histograms_median = np.zeros_like(histograms_mean)
     histograms_percentiles = np.zeros((n_mass_bins, 2, n_temperature_bins))
     halos_per_bin = np.zeros(n_mass_bins)
+    # sort histograms by mass bin, so that every bin is a contiguous slice
+    order, starts = selection.argsort_bins(mass_bin_mask, n_mass_bins)
+    sorted_hists = histograms[order]
     for bin_num in range(n_mass_bins):
-        # mask histogram data
-        halo_hists = selection.mask_quantity(
-            histograms, mass_bin_mask, index=(bin_num + 1)
-        )
+        if starts[bin_num] == starts[bin_num + 1]:
+            logging.debug(f"Mass bin {bin_num} contains no halos.")
+            histograms_mean[bin_num] = np.nan
+            histograms_median[bin_num] = np.nan
+            histograms_percentiles[bin_num] = np.nan
+            continue
+        halo_hists = sorted_hists[starts[bin_num]:starts[bin_num + 1]]
         # calculate mean, median and error
         histograms_mean[bin_num] = np.nanmean(halo_hists, axis=0)
-        histograms_median[bin_num] = np.nanmedian(halo_hists, axis=0)
-        histograms_percentiles[bin_num] = np.nanpercentile(
-            halo_hists,
-            (16, 84),
-            axis=0,
-        )
+        # median and percentiles from a single partitioning pass
+        median, *percentiles = _nanpercentile_by_row(halo_hists, (50, 16, 84))
+        histograms_median[bin_num] = median
+        histograms_percentiles[bin_num] = percentiles
         halos_per_bin[bin_num] = len(halo_hists)
         # diagnostics
         logging.debug(
@@ -191,7 +224,7 @@ def stack_2d_histograms_per_mass_bin(
     :param n_mass_bins: The number of mass bins.
     :param mass_bin_mask: A mask assigning every histogram in
         ``histograms`` to a mass bin. This can be obtained from
-        :func:``sort_masses_into_bins``. Every entry must be a number,
+        :func:`numpy.digitize`. Every entry must be a number,
         assigning the corresponding histogram of the same array index to
         a mass bin.
     :return: An array of shape (M, X, Y) where M is the number of mass
@@ -208,16 +241,35 @@ def stack_2d_histograms_per_mass_bin(
         )
         return
     histograms_mean = np.zeros((n_mass_bins, n_x_bins, n_y_bins))
+    # sort histograms by mass bin, so that every bin is a contiguous slice
+    order, starts = selection.argsort_bins(mass_bin_mask, n_mass_bins)
+    sorted_hists = histograms[order]
+    # find NaN entries once for all bins; invalid halos typically have
+    # histograms filled entirely with NaN, which can simply be skipped
+    nan_entries = np.isnan(sorted_hists).reshape(n_halos, -1)
+    nan_halos = np.all(nan_entries, axis=1)
+    partial_nan_halos = np.any(nan_entries, axis=1)
+    only_invalid_halos = np.array_equal(nan_halos, partial_nan_halos)
     for bin_num in range(n_mass_bins):
-        # mask histogram data
-        halo_hists = selection.mask_quantity(
-            histograms, mass_bin_mask, index=(bin_num + 1)
-        )
-        histograms_mean[bin_num] = np.nanmean(halo_hists, axis=0)
+        start, end = starts[bin_num], starts[bin_num + 1]
+        if start == end:
+            logging.debug(f"Mass bin {bin_num} contains no halos.")
+            histograms_mean[bin_num] = np.nan
+            continue
+        halo_hists = sorted_hists[start:end]
+        if not only_invalid_halos:
+            histograms_mean[bin_num] = np.nanmean(halo_hists, axis=0)
+        elif np.all(nan_halos[start:end]):
+            histograms_mean[bin_num] = np.nan  # no valid halos in bin
+        elif np.any(nan_halos[start:end]):
+            valid_hists = halo_hists[~nan_halos[start:end]]
+            histograms_mean[bin_num] = np.mean(valid_hists, axis=0)
+        else:
+            histograms_mean[bin_num] = np.mean(halo_hists, axis=0)
         # diagnostics
         logging.debug(
             f"Empty halos in mass bin {bin_num}: "
-            f"{np.sum(np.any(np.isnan(halo_hists), axis=1))}"
+            f"{np.count_nonzero(partial_nan_halos[start:end])}"
         )
 
     logging.info("Finished post-processing data.")
@@ -247,14 +299,19 @@ def get_2d_histogram_running_average(
     n_ybins = histogram.shape[0]
     ybin_width = abs(yrange[1] - yrange[0]) / n_ybins
     ybin_centers = np.min(yrange) + np.arange(.5, n_ybins + .5, 1) * ybin_width
-    # Calculate the weighted average for every column: start by multiplying
-    # every entry with its corresponding y-value:
-    hist_weighted = (histogram.transpose() * ybin_centers).transpose()
-    # Sum the weighted values for every column
-    column_sum = np.sum(hist_weighted, axis=0)
+    # Calculate the weighted average for every column: sum every column
+    # weighted with the y-values of the rows in a single pass, without
+    # creating a weighted copy of the histogram
+    column_sum = np.einsum("yx,y->x", histogram, ybin_centers)
     # Finally, get the actual average by normalizing it to the sum of the
-    # weights of the colum
-    return column_sum / np.sum(histogram, axis=0)
+    # weights of the column; empty columns have no average
+    weights_sum = np.sum(histogram, axis=0)
+    return np.divide(
+        column_sum,
+        weights_sum,
+        out=np.full_like(column_sum, np.nan, dtype=np.float64),
+        where=weights_sum != 0,
+    )
 
 
 def get_binned_averages(
@@ -284,12 +341,23 @@ def get_binned_averages(
             f"{values.shape}, bin mask has shape {bin_mask.shape}."
         )
         return
-    avg = []
-    std = []
-    for binned_values in selection.bin_quantity(values, bin_mask, n_bins):
-        avg.append(np.nanmean(binned_values))
-        std.append(np.nanstd(binned_values))
-    return np.array([np.array(avg), np.array(std), np.array(std)])
+    if n_bins == -1:
+        n_bins = np.max(bin_mask)
+    # sum up values per bin in one pass each, ignoring NaN entries
+    valid = ~np.isnan(values)
+    bins, valid_values = bin_mask[valid], values[valid]
+    counts = np.bincount(bins, minlength=n_bins + 1)[1:n_bins + 1]
+    sums = np.bincount(bins, valid_values, minlength=n_bins + 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        avg = sums[1:n_bins + 1] / counts
+        # second pass for the variance, using deviations from the mean
+        in_range = (bins >= 1) & (bins <= n_bins)
+        deviations = valid_values[in_range] - avg[bins[in_range] - 1]
+        variance = np.bincount(
+            bins[in_range], deviations**2, minlength=n_bins + 1
+        )[1:n_bins + 1] / counts
+    std = np.sqrt(variance)
+    return np.array([avg, std, std])
 
 
 def get_binned_medians(
@@ -323,16 +391,15 @@ def get_binned_medians(
             f"{values.shape}, bin mask has shape {bin_mask.shape}."
         )
         return
-    med = []
-    lper = []  # lower percentiles
-    uper = []  # upper percentiles
-    for binned_values in selection.bin_quantity(values, bin_mask, n_bins):
-        med.append(np.nanmedian(binned_values))
-        lper.append(np.nanpercentile(binned_values, 16))
-        uper.append(np.nanpercentile(binned_values, 84))
-    lerr = np.abs(np.array(med) - np.array(lper))  # error below median
-    uerr = np.abs(np.array(med) - np.array(uper))  # error above median
-    return np.array([np.array(med), lerr, uerr])
+    binned_quantity = selection.bin_quantity(values, bin_mask, n_bins)
+    results = np.empty((3, len(binned_quantity)))
+    for i, binned_values in enumerate(binned_quantity):
+        # median and percentiles of the bin from a single partitioning pass
+        results[:, i] = _nanpercentile_by_row(binned_values, (50, 16, 84))
+    # turn percentiles into errors below and above the median in place
+    np.abs(results[0] - results[1], out=results[1])
+    np.abs(results[0] - results[2], out=results[2])
+    return results
 
 
 def column_normalized_hist2d(
@@ -455,6 +522,7 @@ def column_normalized_hist2d(
         # expects hist as shape (nx, ny), so transposition is necessary
         hist = x
         xedges, yedges = None, None
+        out = None  # do not alter the histogram of the caller
     elif x.shape != y.shape:
         logging.error(
             f"Received x and y data arrays of different shape: shape of x is "
@@ -468,29 +536,178 @@ def column_normalized_hist2d(
                 f"x: {x}\ny: {y}\nbins: {bins}\n"
             )
         # if no values are given, assume a normal count/sum is desired
-        if values is None:
+        if values is None and statistic == "sum":
+            statistic = "count"  # sum of unit weights, no need for values
+        elif values is None:
             values = np.ones_like(x)
 
         # calculate histogram
-        hist, xedges, yedges, _ = scipy.stats.binned_statistic_2d(
-            x, y, values, statistic, bins, ranges
-        )
+        uniform = _is_uniform_bins(bins) and ranges is not None
+        if uniform and statistic in ("sum", "count", "mean"):
+            hist, xedges, yedges = _uniform_binned_statistic_2d(
+                x, y, values, statistic, bins, ranges
+            )
+        elif statistic in ("sum", "count"):
+            hist, xedges, yedges = _histogram2d(
+                x, y, values, statistic, bins, ranges
+            )
+        else:
+            hist, xedges, yedges, _ = scipy.stats.binned_statistic_2d(
+                x, y, values, statistic, bins, ranges
+            )
+        out = hist  # new histogram can be normalized in place
 
     # normalize every column according to chosen normalization
     if normalization == "density":
         column_sums = np.sum(hist, axis=1)
         # broadcast column sum array to appropriate shape
-        hist = np.divide(hist, column_sums[:, np.newaxis])
+        hist = np.divide(hist, column_sums[:, np.newaxis], out=out)
     elif normalization == "range":
         column_max = np.max(hist, axis=1)
         # broadcast column max to appropriate shape
-        hist = np.divide(hist, column_max[:, np.newaxis])
+        hist = np.divide(hist, column_max[:, np.newaxis], out=out)
     else:
         raise RuntimeError(f"Unsupported normalization {normalization}.")
 
     return hist.transpose(), xedges, yedges
 
 
+def _is_uniform_bins(bins: Any) -> bool:
+    """
+    Return whether ``bins`` specifies numbers of uniform bins.
+
+    :param bins: Bin specification as accepted by ``column_normalized_hist2d``.
+    :return: True if ``bins`` is an integer or a pair of integers, False
+        if it specifies bin edges.
+    """
+    if isinstance(bins, (int, np.integer)):
+        return True
+    return (
+        isinstance(bins, (tuple, list)) and len(bins) == 2
+        and all(isinstance(n, (int, np.integer)) for n in bins)
+    )
+
+
+def _uniform_bin_indices(
+    a: NDArray, n_bins: int, low: float, high: float
+) -> tuple[NDArray, NDArray]:
+    """
+    Return the indices of the uniform bins into which the values fall.
+
+    The bin index is calculated arithmetically from the value instead of
+    being searched for among the bin edges. As in ``np.histogram``, the
+    result is then corrected for values that floating point rounding
+    places into a neighboring bin, such that every bin includes its left
+    edge and the last bin additionally includes its right edge.
+
+    :param a: Array of values. All values must lie within the range
+        from ``low`` to ``high``.
+    :param n_bins: The number of bins.
+    :param low: Lower edge of the first bin.
+    :param high: Upper edge of the last bin. Must be larger than ``low``.
+    :return: The array of bin indices for every value, and the array of
+        the ``n_bins + 1`` bin edges.
+    """
+    edges = np.linspace(low, high, n_bins + 1)
+    indices = ((a - low) * (n_bins / (high - low))).astype(np.intp)
+    indices[indices == n_bins] -= 1
+    # correct for rounding errors at the bin edges
+    indices[a < edges[indices]] -= 1
+    increment = (a >= edges[indices + 1]) & (indices != n_bins - 1)
+    indices[increment] += 1
+    return indices, edges
+
+
+def _uniform_binned_statistic_2d(
+    x: NDArray,
+    y: NDArray,
+    values: NDArray,
+    statistic: Literal["sum", "count", "mean"],
+    bins: int | tuple[int, int],
+    ranges: NDArray,
+) -> tuple[NDArray, NDArray, NDArray]:
+    """
+    Return a 2D binned statistic over uniform bins within fixed ranges.
+
+    Equivalent to ``scipy.stats.binned_statistic_2d`` for the statistics
+    "sum", "count" and "mean" when the bins are given as numbers of bins
+    and the ranges are given explicitly. Since the bins are uniform, the
+    bin of every point can be calculated directly and the statistic can
+    be accumulated with ``np.bincount``, which is considerably faster
+    than the general bin search done by scipy.
+
+    :param x: The array of shape (N, ) of x-positions of the data points.
+    :param y: The array of shape (N, ) of y-positions of the data points.
+    :param values: The values belonging to each data point, shape (N, ).
+    :param statistic: The statistic to compute per bin.
+    :param bins: The number of bins along both axes, or a tuple of the
+        numbers of bins along the x- and y-axis respectively.
+    :param ranges: The lower and upper edges of the x- and y-axis in the
+        form ``[[xmin, xmax], [ymin, ymax]]``. Points outside of these
+        ranges are ignored.
+    :raises ValueError: If the positions contain non-finite values, as
+        does scipy.
+    :return: The histogram of shape (nx, ny), the x-edges and y-edges.
+    """
+    if not (np.all(np.isfinite(x)) and np.all(np.isfinite(y))):
+        raise ValueError("Data point positions contain non-finite values.")
+    nx, ny = (bins, bins) if isinstance(bins, (int, np.integer)) else bins
+    (xmin, xmax), (ymin, ymax) = ranges
+    inside = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
+    x_indices, xedges = _uniform_bin_indices(x[inside], nx, xmin, xmax)
+    y_indices, yedges = _uniform_bin_indices(y[inside], ny, ymin, ymax)
+    flat_indices = x_indices * ny + y_indices
+
+    if statistic == "count":
+        hist = np.bincount(flat_indices, minlength=nx * ny).astype(float)
+    else:
+        hist = np.bincount(
+            flat_indices, weights=values[inside], minlength=nx * ny
+        )
+        if statistic == "mean":
+            counts = np.bincount(flat_indices, minlength=nx * ny)
+            with np.errstate(invalid="ignore"):
+                hist /= counts
+    return hist.reshape(nx, ny), xedges, yedges
+
+
+def _histogram2d(
+    x: NDArray,
+    y: NDArray,
+    values: NDArray | None,
+    statistic: Literal["sum", "count"],
+    bins: int | tuple[int, int] | NDArray | tuple[NDArray, NDArray],
+    ranges: NDArray | None,
+) -> tuple[NDArray, NDArray, NDArray]:
+    """
+    Return a 2D sum or count histogram using ``np.histogram2d``.
+
+    Equivalent to ``scipy.stats.binned_statistic_2d`` for the statistics
+    "sum" and "count", but avoids the overhead of the generic statistic
+    dispatch of scipy.
+
+    :param x: The array of shape (N, ) of x-positions of the data points.
+    :param y: The array of shape (N, ) of y-positions of the data points.
+    :param values: The values belonging to each data point, shape (N, ).
+        Ignored for the "count" statistic and may be None in that case.
+    :param statistic: The statistic to compute per bin.
+    :param bins: The bin specification, as for ``np.histogram2d``.
+    :param ranges: The lower and upper edges of the x- and y-axis in the
+        form ``[[xmin, xmax], [ymin, ymax]]`` or None to use the range
+        of the data.
+    :raises ValueError: If the positions contain non-finite values, as
+        does scipy.
+    :return: The histogram of shape (nx, ny), the x-edges and y-edges.
+    """
+    if not (np.all(np.isfinite(x)) and np.all(np.isfinite(y))):
+        raise ValueError("Data point positions contain non-finite values.")
+    weights = values if statistic == "sum" else None
+    hist, xedges, yedges = np.histogram2d(
+        x, y, bins=bins, range=ranges, weights=weights
+    )
+    return hist, xedges, yedges
+
+
 def volume_normalized_radial_profile(
     radial_distances: NDArray,
     weight: NDArray,
@@ -568,19 +785,97 @@ def volume_normalized_radial_profile(
     )
 
     # transform units to physical units for accurate volumes
-    if distances_are_log:
-        physical_edges = 10**edges.copy()
-    else:
-        physical_edges = edges.copy()
+    physical_edges = 10**edges if distances_are_log else edges
     if virial_radius is not None:
-        physical_edges *= virial_radius
+        physical_edges = physical_edges * virial_radius
     # normalize every column by the shell volume
-    volumes = 4 / 3 * np.pi * (physical_edges[1:]**3 - physical_edges[:-1]**3)
+    volumes = 4 / 3 * np.pi * np.diff(physical_edges**3)
 
     # return x-axis (edges) in units of original distances
     return hist / volumes, edges
 
 
+def volume_normalized_radial_profiles_by_label(
+    radial_distances: NDArray,
+    weight: NDArray,
+    labels: NDArray,
+    n_labels: int,
+    bins: int,
+    radial_range: tuple[float, float] | NDArray,
+    virial_radius: float | None = None,
+) -> tuple[NDArray, NDArray]:
+    """
+    Generate radial profiles for groups of entries, normalized by volume.
+
+    The function is equivalent to calling
+    :func:`volume_normalized_radial_profile` separately for every group
+    of entries that share the same label, but accumulates the weights
+    of all groups in a single, blocked pass over the data, computing
+    the radial bin of every entry only once. Entries are assigned
+    to the groups by their integer ``labels``, ranging from 0 to
+    ``n_labels - 1``; entries with labels outside this range are not
+    part of any profile. The radial bins must be uniform within a fixed
+    range.
+
+    :param radial_distances: The array of radial distances, either in
+        physical units or in units of virial radii. Shape (N, ).
+    :param weight: The array of weights to sum per bin. Must have the
+        same shape as ``radial_distances``.
+    :param labels: The array of integer group labels of every entry.
+        Must have the same shape as ``radial_distances``.
+    :param n_labels: The number of groups, i.e. of profiles.
+    :param bins: The number of radial bins.
+    :param radial_range: The lower and upper edge of the bin range. If
+        the virial radius is given, this must be given in units of the
+        virial radius, otherwise in physical units.
+    :param virial_radius: If the radial distances are given in units of
+        the virial radius, specifying the virial radius will return them
+        to physical units before calculating the shell volumes. See
+        :func:`volume_normalized_radial_profile` for details.
+    :return: The tuple of the shell volume normalized histograms of
+        shape (``n_labels``, ``bins``), where the first index selects
+        the group, and the array of bin edges in the same units as the
+        received ``radial_distances``.
+    """
+    low, high = radial_range
+    edges = np.linspace(low, high, bins + 1)
+    scale = bins / (high - low)
+    step = (high - low) / bins
+    n_hist = n_labels * bins
+    hist = np.zeros(n_hist + 1)  # last entry collects all ignored entries
+    # process blocks that fit into the cache, as does np.histogram
+    for start in range(0, len(radial_distances), _HISTOGRAM_BLOCK_SIZE):
+        block = slice(start, start + _HISTOGRAM_BLOCK_SIZE)
+        distances = radial_distances[block]
+        block_labels = labels[block]
+        with np.errstate(invalid="ignore"):  # NaN is ignored below
+            indices = ((distances - low) * scale).astype(np.intp)
+        np.clip(indices, 0, bins - 1, out=indices)
+        # correct for rounding errors at the bin edges as np.histogram
+        # does, with the edges calculated like those of np.linspace
+        indices -= distances < indices * step + low
+        indices += (
+            (distances >= (indices + 1) * step + low) & (indices < bins - 1)
+        )
+        indices += block_labels * bins
+        valid = (
+            (distances >= low) & (distances <= high) & (block_labels >= 0)
+            & (block_labels < n_labels)
+        )
+        indices[~valid] = n_hist
+        hist += np.bincount(
+            indices, weights=weight[block], minlength=n_hist + 1
+        )
+    hist = hist[:n_hist].reshape(n_labels, bins)
+
+    physical_edges = edges
+    if virial_radius is not None:
+        physical_edges = edges * virial_radius
+    # the shell volumes are the same for all groups
+    hist /= 4 / 3 * np.pi * np.diff(physical_edges**3)
+    return hist, edges
+
+
 def find_deviation_from_median_per_bin(
     quantity: NDArray,
     masses: NDArray,
@@ -619,19 +914,17 @@ def find_deviation_from_median_per_bin(
 
     # find the median in every mass bin
     medians = np.zeros(num_bins)
+    order, starts = selection.argsort_bins(mask, num_bins)
     for i in range(num_bins):
-        values_in_bin = quantity[mask == i + 1]
+        values_in_bin = quantity[order[starts[i]:starts[i + 1]]]
         medians[i] = np.nanmedian(values_in_bin)
 
-    # for every color quantity, compare it to its median
-    for j, cur_data in enumerate(quantity):
-        cur_mass_bin_index = mask[j] - 1  # index of mass bin
-        # some clusters have just above log M = 15.4, place them into
-        # the last mass bin anyway
-        # TODO: replace
-        if cur_mass_bin_index > num_bins - 1:
-            cur_mass_bin_index = num_bins - 1
-        results[j] = cur_data / medians[cur_mass_bin_index]
+    # for every color quantity, compare it to its median; some clusters
+    # have just above log M = 15.4, place them into the last mass bin
+    # anyway
+    # TODO: replace
+    mass_bin_indices = np.minimum(mask - 1, num_bins - 1)
+    results[:] = quantity / medians[mass_bin_indices]
 
     return results
 
@@ -681,9 +974,11 @@ def pearson_corrcoeff_per_bin(
     corrcoeffs = np.zeros(num_bins)
 
     # find the Pearson correlation coefficient in every mass bin
+    order, starts = selection.argsort_bins(mask, num_bins)
     for i in range(num_bins):
-        xs_in_bin = x_data[mask == i + 1]
-        ys_in_bin = y_data[mask == i + 1]
+        in_bin = order[starts[i]:starts[i + 1]]
+        xs_in_bin = x_data[in_bin]
+        ys_in_bin = y_data[in_bin]
         # create masks for only non-nan values
         x_nan_guard = ~np.isnan(xs_in_bin)
         y_nan_guard = ~np.isnan(ys_in_bin)
@@ -768,10 +1063,12 @@ def two_side_difference_ratio(
     # create an array for the results
     ratios = np.zeros(num_bins)
 
+    order, starts = selection.argsort_bins(mask, num_bins)
     for i in range(num_bins):
         # find all points in current mass bin
-        color_in_bin = color_data[mask == i + 1]
-        ys_in_bin = y_data[mask == i + 1]
+        in_bin = order[starts[i]:starts[i + 1]]
+        color_in_bin = color_data[in_bin]
+        ys_in_bin = y_data[in_bin]
         # find median y
         y_median = np.nanmedian(ys_in_bin)
         # find mean color above and below median
@@ -277,3 +277,25 @@ def test_select_if_in_warning_if_not_subset(
             selection.select_if_in(a, s, warn_if_not_subset=True)
             msg = "`select_if_in`: `s` is not a subset of `a`!"
             assert msg in caplog.text
+
+
+def test_select_if_in_searchsort_lookup_table() -> None:
+    """Test that the lookup table for integer IDs matches other modes"""
+    rng = np.random.default_rng(42)
+    a = rng.permutation(1000)
+    s = rng.integers(-50, 1050, size=500)
+
+    expected = np.array([np.flatnonzero(a == v)[0] for v in s if v in a])
+    output = selection.select_if_in(a, s, mode="searchsort")
+    np.testing.assert_equal(output, expected)
+
+    # widely spread values do not use the table but give the same result
+    output = selection.select_if_in(a * 1000, s * 1000, mode="searchsort")
+    np.testing.assert_equal(output, expected)
+
+    # in mode intersect, the indices sort a
+    expected = np.argsort(a)[np.unique(s[(s >= 0) & (s < 1000)])]
+    output = selection.select_if_in(a, s, mode="intersect")
+    np.testing.assert_equal(output, expected)
+    output = selection.select_if_in(a * 1000, s * 1000, mode="intersect")
+    np.testing.assert_equal(output, expected)
@@ -1,9 +1,12 @@
 """
 Unit tests for the statistics module.
 """
+import warnings
+
 import numpy as np
 import numpy.ma as ma
 import pytest
+import scipy.stats
 
 from library.processing import selection, statistics
 
@@ -131,6 +134,32 @@ def test_mask_quantity_uncompressed_dimensions():
     assert output.shape == (3, 2)
 
 
+def test_bin_quantity_2d():
+    """
+    Test that binning a 2D array retains the shape of its entries.
+    """
+    input_array = np.array([[0, 1], [2, 3], [4, 5], [6, 7], [8, 9]])
+    bin_mask = np.array([2, 1, 2, 0, 1])
+    output = list(selection.bin_quantity(input_array, bin_mask))
+    assert len(output) == 2
+    np.testing.assert_array_equal(output[0], np.array([[2, 3], [8, 9]]))
+    np.testing.assert_array_equal(output[1], np.array([[0, 1], [4, 5]]))
+
+
+def test_get_binned_averages():
+    """
+    Test the binned averages, including NaN entries and an empty bin.
+    """
+    values = np.array([1, 3, np.nan, 2, 4, 6, 5, 7])
+    bin_mask = np.array([1, 1, 1, 3, 3, 3, 0, 4])
+    output = statistics.get_binned_averages(values, bin_mask, n_bins=3)
+    assert output.shape == (3, 3)
+    np.testing.assert_array_almost_equal(output[0], [2, np.nan, 4])
+    expected_std = np.array([1, np.nan, np.sqrt(8 / 3)])
+    np.testing.assert_array_almost_equal(output[1], expected_std)
+    np.testing.assert_array_almost_equal(output[2], expected_std)
+
+
 @pytest.fixture
 def hist_data():
     """Yield x- and y-data for a simple 2D histogram."""
@@ -165,6 +194,51 @@ def test_column_normalized_hist2d_range(hist_data):
     np.testing.assert_almost_equal(output[0], expected, decimal=2)
 
 
+def test_column_normalized_hist2d_uniform_bins_match_scipy():
+    """
+    Test that the fast path for uniform bins matches scipy.
+    """
+    rng = np.random.default_rng(42)
+    x_data = rng.uniform(-0.5, 2.5, size=1000)
+    y_data = rng.uniform(0, 1, size=1000)
+    x_data[:100] = np.round(x_data[:100], decimals=1)  # points on edges
+    values = rng.uniform(0, 1, size=1000)
+    ranges = [[0, 2], [0, 1]]
+    for statistic in ["sum", "count", "mean"]:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            expected = scipy.stats.binned_statistic_2d(
+                x_data, y_data, values, statistic, (20, 5), ranges
+            )
+            output = statistics._uniform_binned_statistic_2d(
+                x_data, y_data, values, statistic, (20, 5), ranges
+            )
+        np.testing.assert_allclose(output[0], expected[0])
+        np.testing.assert_allclose(output[1], expected[1])
+        np.testing.assert_allclose(output[2], expected[2])
+
+
+def test_column_normalized_hist2d_bin_edges_match_scipy():
+    """
+    Test that the numpy path for explicit bin edges matches scipy.
+    """
+    rng = np.random.default_rng(42)
+    x_data = rng.uniform(-0.5, 2.5, size=1000)
+    y_data = rng.uniform(0, 1, size=1000)
+    values = rng.uniform(0, 1, size=1000)
+    bins = (np.linspace(0, 2, 21)**2, np.linspace(0, 1, 6))
+    for statistic in ["sum", "count"]:
+        expected = scipy.stats.binned_statistic_2d(
+            x_data, y_data, values, statistic, bins
+        )
+        output = statistics._histogram2d(
+            x_data, y_data, values, statistic, bins, None
+        )
+        np.testing.assert_allclose(output[0], expected[0])
+        np.testing.assert_allclose(output[1], expected[1])
+        np.testing.assert_allclose(output[2], expected[2])
+
+
 def test_column_normalized_hist2d_existing_histogram():
     """
     Test the function using an existing histogram to normalize.
@@ -292,6 +366,28 @@ def test_volume_normalized_radial_profile_log_scale_with_virial_radius():
     np.testing.assert_almost_equal(expected, output[0])
 
 
+def test_volume_normalized_radial_profiles_by_label():
+    """Test that the profiles match those of the individual groups"""
+    rng = np.random.default_rng(42)
+    rs = rng.uniform(0, 2.5, size=1000)
+    ws = rng.uniform(0, 1, size=1000)
+    labels = rng.integers(-1, 4, size=1000)  # -1 and 3 are in no group
+    output = statistics.volume_normalized_radial_profiles_by_label(
+        rs, ws, labels, 3, 10, (0, 2), virial_radius=100
+    )
+    assert output[0].shape == (3, 10)
+    for label in range(3):
+        expected = statistics.volume_normalized_radial_profile(
+            rs[labels == label],
+            ws[labels == label],
+            10,
+            virial_radius=100,
+            radial_range=(0, 2),
+        )
+        np.testing.assert_allclose(output[0][label], expected[0])
+        np.testing.assert_allclose(output[1], expected[1])
+
+
 def test_pearson_corrcoeff_per_bin():
     """Test the function for Pearson correlation coefficients"""
     xs = np.array([0, 1, 2, 3, 4, 0, 1, 2, 3, 4])
@@ -11,6 +11,9 @@ from typing import TypeAlias
 import typedef
 from library.config import config, logging_config
 
+# log level with which logging was last configured by `startup`
+_LOGGING_CONFIGURED: dict[str, int] = {}
+
 # type def
 PipelineKwargs: TypeAlias = dict[str, bool | str | int | config.Config]
 
@@ -265,11 +268,13 @@ def startup(
         dictionary can be updated with additional information required
         for other subclasses of pipelines afterward.
     """
-    # set up logging
+    # set up logging, unless it is already set up with this level
     log_level = parse_verbosity(namespace)
-    log_config = logging_config.get_logging_config(log_level)
-    logging.config.dictConfig(log_config)
-    logging.addLevelName(18, "DIAGNOSTIC")  # custom level
+    if _LOGGING_CONFIGURED.get("level") != log_level:
+        log_config = logging_config.get_logging_config(log_level)
+        logging.config.dictConfig(log_config)
+        logging.addLevelName(18, "DIAGNOSTIC")  # custom level
+        _LOGGING_CONFIGURED["level"] = log_level
     # parse namespace for initial kwargs dictionary for pipelines
     return parse_namespace(
         namespace,
@@ -466,7 +471,7 @@ def _assemble_path_dict(
 
     if alt_figure_dir:
         new_path = Path(alt_figure_dir)
-        if new_path.exists() and new_path.is_dir():
+        if new_path.is_dir():
             figure_path = new_path
         else:
             logging.warning(
@@ -479,7 +484,7 @@ def _assemble_path_dict(
 
     if alt_data_dir:
         new_path = Path(alt_data_dir)
-        if new_path.exists() and new_path.is_dir():
+        if new_path.is_dir():
             data_path = new_path
         else:
             logging.warning(
@@ -6,14 +6,15 @@ from __future__ import annotations
 import dataclasses
 import logging
 import logging.config
+import os
+import resource
+import sys
 import time
 import tracemalloc
 from abc import abstractmethod
 from pathlib import Path
 from typing import TYPE_CHECKING, Literal, Sequence
 
-from matplotlib import pyplot as plt
-
 import typedef
 
 if TYPE_CHECKING:
@@ -22,6 +23,9 @@ if TYPE_CHECKING:
     # Reason for noqa: https://github.com/PyCQA/pyflakes/issues/648
     from library.config import config  # noqa: F401
 
+# number of bytes per unit of memory
+_MEMORY_UNITS = {"kB": 1024., "MB": 1024.**2, "GB": 1024.**3}
+
 
 @dataclasses.dataclass
 class Pipeline:
@@ -45,8 +49,14 @@ class Pipeline:
     fig_ext: Literal["pdf", "svg", "png", "jpeg", "jpg", "tif", "esp", "ps"]
 
     def __post_init__(self):
-        # diagnostic log of all params
-        args = [f"{f}: {v}" for f, v in dataclasses.asdict(self).items()]
+        # diagnostic log of all params; skip formatting them (and the
+        # deep copy of `dataclasses.asdict`) unless it is actually logged
+        if not logging.getLogger().isEnabledFor(logging.DEBUG):
+            return
+        args = [
+            f"{f.name}: {getattr(self, f.name)}"
+            for f in dataclasses.fields(self)
+        ]
         args_as_list = "\n".join(args)
         logging.debug(
             f"Received the following pipeline parameters:\n{args_as_list}"
@@ -77,19 +87,14 @@ class Pipeline:
             subdirs = []
         if self.to_file or force:
             data_path = Path(self.paths["data_dir"])
-            if not data_path.exists():
-                logging.info(
-                    f"Creating missing data directory {str(data_path)}."
-                )
-                data_path.mkdir(parents=True)
+            logging.debug(
+                f"Creating data directory {str(data_path)} and "
+                f"subdirectories {list(subdirs)} where missing."
+            )
+            # mkdir with exist_ok avoids a separate existence check
+            data_path.mkdir(parents=True, exist_ok=True)
             for subdirectory in subdirs:
-                logging.debug(f"Checking subdirectory {subdirectory}.")
-                additional_path = data_path / subdirectory
-                if not additional_path.exists():
-                    logging.info(
-                        f"Creating missing subdirectory {subdirectory}."
-                    )
-                    additional_path.mkdir(parents=True)
+                (data_path / subdirectory).mkdir(parents=True, exist_ok=True)
 
     def _verify_directories(self) -> int:
         """
@@ -105,29 +110,29 @@ class Pipeline:
             does not exist.
         """
         # directories
-        if "data_dir" in self.paths.keys():
-            data_dir = self.paths["data_dir"]
-            if not data_dir.exists() or not data_dir.is_dir():
-                logging.error(
-                    f"Data directory under {data_dir} does not exist."
-                )
-                return 1
-        else:
+        data_dir = self.paths.get("data_dir")
+        if data_dir is None:
             logging.error(
                 f"The FileDict received does not have a data directory "
                 f"specified!\n{self.paths}"
             )
             return 2
-        # virial temperature file
-        if "virial_temp_file_stem" in self.paths.keys():
-            data_dir = self.paths["data_dir"]
-            data_file = data_dir / f"{self.paths['virial_temp_file_stem']}.npy"
-            if not data_file.exists() or not data_file.is_file():
-                logging.error(
-                    f"Data file for virial temperature under {data_dir} does "
-                    "not exist."
-                )
-                return 2
+        # virial temperature file; if it exists, so does the directory,
+        # which then need not be checked separately
+        virial_temp_file_stem = self.paths.get("virial_temp_file_stem")
+        if virial_temp_file_stem is not None:
+            data_file = data_dir / f"{virial_temp_file_stem}.npy"
+            if data_file.is_file():
+                return 0
+        if not data_dir.is_dir():  # also False if it does not exist
+            logging.error(f"Data directory under {data_dir} does not exist.")
+            return 1
+        if virial_temp_file_stem is not None:
+            logging.error(
+                f"Data file for virial temperature under {data_dir} does "
+                "not exist."
+            )
+            return 2
         return 0
 
     @staticmethod
@@ -146,9 +151,8 @@ class Pipeline:
             used to time the next process.
         """
         now = time.time()
-        time_diff = now - start_time
-        time_fmt = time.strftime('%H:%M:%S', time.gmtime(time_diff))
-        logging.info(f"Spent {time_fmt} hours on {step_description}.")
+        time_fmt = format_duration(now - start_time)
+        logging.info(f"Spent {time_fmt} (hh:mm:ss) on {step_description}.")
         return now
 
     def _save_fig(
@@ -182,6 +186,9 @@ class Pipeline:
         :param tight_layout: Whether to use tight layout. Defaults to True.
         :return: None
         """
+        # imported here, so pipelines run without plots never load pyplot
+        from matplotlib import pyplot as plt
+
         if self.no_plots:
             plt.close(figure)
             return
@@ -197,9 +204,7 @@ class Pipeline:
         filepath = Path(self.paths["figures_dir"])
         if subdir:
             filepath = filepath / Path(subdir)
-        if not filepath.exists():
-            logging.info(f"Creating missing figures directory {filepath}.")
-            filepath.mkdir(parents=True)
+        filepath.mkdir(parents=True, exist_ok=True)
 
         if tight_layout:
             figure.savefig(filepath / filename, bbox_inches="tight")
@@ -218,10 +223,19 @@ class DiagnosticsPipeline(Pipeline):
     Class provides methods for logging memory usage with its own new
     logging level MEMLOG of severity 18. It also offers a handy method
     that combines timing and memory usage information.
+
+    By default, the memory usage is the resident memory of the process
+    as reported by the operating system, which comes at no cost during
+    execution. Subclasses can set ``use_tracemalloc`` to True to instead
+    trace the memory allocated by Python, which slows down every memory
+    allocation but allows the peak memory to be reset between steps.
     """
 
+    use_tracemalloc = False
+
     def __post_init__(self):
-        tracemalloc.start()
+        if self.use_tracemalloc:
+            tracemalloc.start()
         return super().__post_init__()
 
     @abstractmethod
@@ -244,7 +258,9 @@ class DiagnosticsPipeline(Pipeline):
             diagnostics are logged.
         :param reset_peak: Whether to reset the peak of the traced
             memory (so that in the next step, the peak can be determined
-            independently of the previous steps).
+            independently of the previous steps). Only has an effect if
+            ``use_tracemalloc`` is True; the peak resident memory cannot
+            be reset, so it is logged as the peak so far instead.
         :param unit: The unit to convert the memory into. Can be one of
             the following: kB, MB, GB. If omitted, the memory is given
             in bytes. Optional, defaults to display in gigabytes.
@@ -252,15 +268,21 @@ class DiagnosticsPipeline(Pipeline):
             epoch.
         """
         # memory diagnostics
-        mem = tracemalloc.get_traced_memory()
-        self._memlog(
-            f"Peak memory usage during {step_description}", mem[1], unit
-        )
+        if self.use_tracemalloc:
+            current, peak = tracemalloc.get_traced_memory()
+            if reset_peak:
+                tracemalloc.reset_peak()
+            peak_message = f"Peak memory usage during {step_description}"
+        else:
+            # the peak resident memory covers the lifetime of the process
+            current, peak = _get_resident_memory()
+            peak_message = (
+                f"Peak memory usage so far, after {step_description}"
+            )
+        self._memlog(peak_message, peak, unit)
         self._memlog(
-            f"Current memory usage after {step_description}", mem[0], unit
+            f"Current memory usage after {step_description}", current, unit
         )
-        if reset_peak:
-            tracemalloc.reset_peak()
         # runtime diagnostics
         return self._timeit(start_time, step_description)
 
@@ -283,14 +305,48 @@ class DiagnosticsPipeline(Pipeline):
             in bytes. Defaults to display in gigabytes.
         :return: None
         """
-        match unit:
-            case "kB":
-                memory = memory_used / 1024.
-            case "MB":
-                memory = memory_used / 1024. / 1024.
-            case "GB":
-                memory = memory_used / 1024. / 1024. / 1024.
-            case _:
-                memory = memory_used
-                unit = "Bytes"  # assume the unit is bytes
+        if not logging.getLogger().isEnabledFor(18):
+            return
+        divisor = _MEMORY_UNITS.get(unit)
+        if divisor is None:
+            memory = memory_used
+            unit = "Bytes"  # assume the unit is bytes
+        else:
+            memory = memory_used / divisor
         logging.log(18, f"{message}: {memory:,.4} {unit}.")
+
+
+def format_duration(seconds: float) -> str:
+    """
+    Format a duration as hours, minutes and seconds.
+
+    :param seconds: The duration in seconds. Fractions of a second are
+        truncated.
+    :return: The duration formatted as ``hh:mm:ss``.
+    """
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+
+
+def _get_resident_memory() -> tuple[int, int]:
+    """
+    Return the current and peak resident memory of the process in bytes.
+
+    The peak is taken from ``resource.getrusage``. The current resident
+    memory is read from ``/proc/self/statm`` where available and is
+    otherwise approximated by the peak.
+
+    :return: Tuple of current and peak resident memory in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak *= 1024  # Linux reports kilobytes, macOS bytes
+    try:
+        with open("/proc/self/statm") as file:
+            resident_pages = int(file.read().split()[1])
+    except OSError:
+        return peak, peak
+    current = resident_pages * os.sysconf("SC_PAGE_SIZE")
+    # the peak may lag behind the current memory by the last few pages
+    return current, max(current, peak)
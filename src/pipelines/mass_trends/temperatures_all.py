@@ -86,7 +86,7 @@ class IndividualsMassTrendPipeline(base.Pipeline):
             )
 
         # Step 4: get primary data - histograms for every halo
-        begin = time.time()
+        begin = time.perf_counter_ns()
         logging.info("Calculating gas fraction and mass for all halos.")
         if self.normalize:
             norm = virial_temperatures
@@ -148,11 +148,10 @@ class IndividualsMassTrendPipeline(base.Pipeline):
                 warm_by_mass=warm_by_mass,
                 hot_by_mass=hot_by_mass,
             )
-        end = time.time()
+        end = time.perf_counter_ns()
         # get time spent on computation
-        time_diff = end - begin
-        time_fmt = time.strftime('%H:%M:%S', time.gmtime(time_diff))
-        logging.info(f"Spent {time_fmt} hours on execution.")
+        time_fmt = base.format_duration((end - begin) / 1e9)
+        logging.info(f"Spent {time_fmt} (hh:mm:ss) on execution.")
 
         # Step 6: plot the data
         if self.no_plots:
@@ -3,10 +3,15 @@ Radial density profiles, split by radial gas velocity.
 """
 from __future__ import annotations
 
+import functools
 import logging
+import os
 import sys
+import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, ClassVar, Literal
+from typing import TYPE_CHECKING, Callable, ClassVar, Literal
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -14,13 +19,19 @@ import numpy as np
 from library import compute
 from library.config import config
 from library.data_acquisition import gas_daq, halos_daq
+from library.loading import load_npz
 from library.plotting import colormaps, common
-from library.processing import selection, statistics
+from library.processing import parallelization, selection, statistics
 from pipelines import base
 
 if TYPE_CHECKING:
+    from pathlib import Path
+
     from numpy.typing import NDArray
 
+# number of threads reading the individual histogram files
+_LOAD_THREADS = 8
+
 
 @dataclass
 class GenerateIndividualHistogramsPipeline(base.Pipeline):
@@ -71,6 +82,7 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         tng_300_dp = root / "TNG300_1" / "density_profiles" / "by_velocity"
         tng_clstr_dp = root / "TNG_Cluster" / "density_profiles" / "by_velocity"
         self.data_paths = {"TNG300_1": tng_300_dp, "TNG_Cluster": tng_clstr_dp}
+        self.gas_data_cache_dir = root / "TNG_Cluster" / "gas_data"
 
     def run(self) -> int:
         """
@@ -109,32 +121,12 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
 
         # Step 2: For every cluster in TNG300-1, create a density profile
         logging.info("Processing all clusters in TNG300-1.")
-        for i, halo_id in enumerate(tng300_data["IDs"]):
-            logging.debug(f"Processing TNG300 cluster {halo_id}.")
-            virial_velocity = compute.get_virial_velocity(
-                tng300_data[self.config.mass_field][i],
-                tng300_data[self.config.radius_field][i],
-            )
-            gas_data = self._get_tng300_gas_data(halo_id)
-            histograms, edges = self._get_profile_of_cluster(
-                gas_data,
-                tng300_data[self.config.radius_field][i],
-                virial_velocity,
-            )
-            filename = (
-                f"{self.paths['data_file_stem']}_TNG300_1_halo_{halo_id}.npz"
-            )
-            np.savez(
-                self.data_paths["TNG300_1"] / filename,
-                histograms=histograms,
-                edges=edges,
-                halo_id=halo_id,
-                halo_mass=tng300_data[self.config.mass_field][i],
-            )
-            virial_velocities[i] = virial_velocity
+        virial_velocities[:self.n_tng300] = self._process_clusters(
+            self._process_tng300_cluster, tng300_data
+        )
 
         # clean-up
-        del tng300_data, gas_data, histograms
+        del tng300_data
 
         # Step 3: Load group data for TNG-Cluster
         fields.append("GroupPos")
@@ -148,34 +140,9 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
 
         # Step 4: For every cluster in TNG-Cluster, create a density profile
         logging.info("Processing all clusters in TNG-Cluster.")
-        for i, halo_id in enumerate(tngclstr_data["IDs"]):
-            logging.debug(f"Processing TNG-Cluster cluster {halo_id}.")
-            virial_velocity = compute.get_virial_velocity(
-                tngclstr_data[self.config.mass_field][i],
-                tngclstr_data[self.config.radius_field][i],
-            )
-            gas_data = self._get_tngclstr_gas_data(
-                halo_id,
-                tngclstr_data["GroupPos"][i],
-                tngclstr_data["GroupVel"][i],
-                tngclstr_data[self.config.radius_field][i],
-            )
-            histograms, edges = self._get_profile_of_cluster(
-                gas_data,
-                tngclstr_data[self.config.radius_field][i],
-                virial_velocity,
-            )
-            filename = (
-                f"{self.paths['data_file_stem']}_TNG_Cluster_cluster_{halo_id}.npz"
-            )
-            np.savez(
-                self.data_paths["TNG_Cluster"] / filename,
-                histograms=histograms,
-                edges=edges,
-                halo_id=halo_id,
-                halo_mass=tngclstr_data[self.config.mass_field][i],
-            )
-            virial_velocities[self.n_tng300 + i] = virial_velocity
+        virial_velocities[self.n_tng300:] = self._process_clusters(
+            self._process_tngclstr_cluster, tngclstr_data
+        )
 
         # Save virial velocities to file
         np.save(
@@ -185,6 +152,107 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
 
         return 0
 
+    def _process_clusters(
+        self,
+        callback: Callable[[dict[str, NDArray], int], float],
+        cluster_data: dict[str, NDArray],
+    ) -> NDArray:
+        """
+        Process every cluster of the given cluster data.
+
+        Clusters are processed independently, so if more than one
+        process is available, they are distributed over the processes,
+        one cluster at a time.
+
+        :param callback: The method to process a single cluster. Must
+            take the cluster data and the index of the cluster in it,
+            and return the virial velocity of the cluster.
+        :param cluster_data: The group catalogue data of the clusters.
+        :return: The array of virial velocities of all clusters.
+        """
+        n_clusters = len(cluster_data["IDs"])
+        if self.processes > 1:
+            return parallelization.process_data_starmap(
+                functools.partial(callback, cluster_data),
+                self.processes,
+                np.arange(n_clusters),
+                chunksize=1,  # one cluster per process
+            )
+        return np.array([callback(cluster_data, i) for i in range(n_clusters)])
+
+    def _process_tng300_cluster(
+        self, tng300_data: dict[str, NDArray], i: int
+    ) -> float:
+        """
+        Create and save the density profile of a TNG300-1 cluster.
+
+        :param tng300_data: The group catalogue data of the clusters.
+        :param i: The index of the cluster in ``tng300_data``.
+        :return: The virial velocity of the cluster in km/s.
+        """
+        halo_id = tng300_data["IDs"][i]
+        logging.debug(f"Processing TNG300 cluster {halo_id}.")
+        virial_velocity = compute.get_virial_velocity(
+            tng300_data[self.config.mass_field][i],
+            tng300_data[self.config.radius_field][i],
+        )
+        gas_data = self._get_tng300_gas_data(halo_id)
+        histograms, edges = self._get_profile_of_cluster(
+            gas_data,
+            tng300_data[self.config.radius_field][i],
+            virial_velocity,
+        )
+        filename = (
+            f"{self.paths['data_file_stem']}_TNG300_1_halo_{halo_id}.npz"
+        )
+        np.savez(
+            self.data_paths["TNG300_1"] / filename,
+            histograms=histograms,
+            edges=edges,
+            halo_id=halo_id,
+            halo_mass=tng300_data[self.config.mass_field][i],
+        )
+        return virial_velocity
+
+    def _process_tngclstr_cluster(
+        self, tngclstr_data: dict[str, NDArray], i: int
+    ) -> float:
+        """
+        Create and save the density profile of a TNG-Cluster cluster.
+
+        :param tngclstr_data: The group catalogue data of the clusters.
+        :param i: The index of the cluster in ``tngclstr_data``.
+        :return: The virial velocity of the cluster in km/s.
+        """
+        halo_id = tngclstr_data["IDs"][i]
+        logging.debug(f"Processing TNG-Cluster cluster {halo_id}.")
+        virial_velocity = compute.get_virial_velocity(
+            tngclstr_data[self.config.mass_field][i],
+            tngclstr_data[self.config.radius_field][i],
+        )
+        gas_data = self._get_tngclstr_gas_data(
+            halo_id,
+            tngclstr_data["GroupPos"][i],
+            tngclstr_data["GroupVel"][i],
+            tngclstr_data[self.config.radius_field][i],
+        )
+        histograms, edges = self._get_profile_of_cluster(
+            gas_data,
+            tngclstr_data[self.config.radius_field][i],
+            virial_velocity,
+        )
+        filename = (
+            f"{self.paths['data_file_stem']}_TNG_Cluster_cluster_{halo_id}.npz"
+        )
+        np.savez(
+            self.data_paths["TNG_Cluster"] / filename,
+            histograms=histograms,
+            edges=edges,
+            halo_id=halo_id,
+            halo_mass=tngclstr_data[self.config.mass_field][i],
+        )
+        return virial_velocity
+
     def _get_profile_of_cluster(
         self,
         gas_data: dict[str, NDArray],
@@ -204,10 +272,11 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
 
         Each of these keys must have as a corresponding value the 1D
         array of these quantities for every gas cell within the halo
-        of the cluster. The function then uses them to find the radial
-        density profile of the cluster, both as a total and as three
-        profiles for only inflowing, outflowing and quasi-static gas
-        respectively. The result is returned.
+        of the cluster, restricted to the current temperature regime.
+        The function then uses them to find the radial density profile
+        of the cluster, both as a total and as three profiles for only
+        inflowing, outflowing and quasi-static gas respectively. The
+        result is returned.
 
         :param gas_data: The dictionary of the gas data for all gas cells
             of the current cluster. All values must be arrays of shape
@@ -240,54 +309,30 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         else:
             limit = self.limiting_velocity  # in km/s
         ranges = np.array([0, self.max_distance])
-        # translator for temperature regime to mask index
-        regime_to_index = {"cool": 1, "warm": 2, "hot": 3}
-        # mask gas to only current regime
-        if self.regime != "total":
-            temperature_mask = np.digitize(
-                np.log10(gas_data["Temperatures"]), self.temperature_bins
-            )
-            gas_data = selection.mask_data_dict(
-                gas_data, temperature_mask, regime_to_index[self.regime]
-            )
 
-        # create the histograms for total, inflow, quasi-static and outflow
-        total_hist, edges = statistics.volume_normalized_radial_profile(
+        # label gas by velocity: inflow, quasi-static, outflow, or none
+        # of these (which only enters the total), by counting the limits
+        # the velocity is above of
+        velocities = gas_data["RadialVelocities"]
+        labels = (velocities > -limit).astype(np.intp)
+        labels += velocities >= limit
+        labels[np.isnan(velocities)] = 3
+
+        # create the histograms for all velocity regimes in a single pass
+        hists, edges = statistics.volume_normalized_radial_profiles_by_label(
             gas_data["Distances"],
             gas_data["Masses"],
+            labels,
+            4,
             self.radial_bins,
+            ranges,
             cluster_radius,
-            radial_range=ranges,
-        )
-        inflow_mask = np.where(gas_data["RadialVelocities"] <= -limit)
-        inflow_hist, _ = statistics.volume_normalized_radial_profile(
-            gas_data["Distances"][inflow_mask],
-            gas_data["Masses"][inflow_mask],
-            self.radial_bins,
-            cluster_radius,
-            radial_range=ranges,
-        )
-        static_mask = np.where(np.abs(gas_data["RadialVelocities"]) < limit)
-        static_hist, _ = statistics.volume_normalized_radial_profile(
-            gas_data["Distances"][static_mask],
-            gas_data["Masses"][static_mask],
-            self.radial_bins,
-            cluster_radius,
-            radial_range=ranges,
-        )
-        outflow_mask = np.where(gas_data["RadialVelocities"] >= limit)
-        outflow_hist, _ = statistics.volume_normalized_radial_profile(
-            gas_data["Distances"][outflow_mask],
-            gas_data["Masses"][outflow_mask],
-            self.radial_bins,
-            cluster_radius,
-            radial_range=ranges,
         )
 
-        # package and return results
-        histograms = np.array(
-            [total_hist, inflow_hist, static_hist, outflow_hist]
-        )
+        # package and return results: total, inflow, quasi-static, outflow
+        histograms = np.empty((4, self.radial_bins))
+        np.sum(hists, axis=0, out=histograms[0])
+        histograms[1:] = hists[:3]
         return histograms, edges
 
     def _get_tng300_gas_data(self, halo_id: int) -> dict[str, NDArray]:
@@ -297,7 +342,7 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         The function loads the particle data for all particles within
         two virial radii and possibly reduces it to only those particles
         within the region specified (default is all particles within the
-        two virial radii).
+        two virial radii) and within the current temperature regime.
 
         Returned dictionary will have only the keys required for further
         processing:
@@ -310,43 +355,35 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         :param halo_id: ID of the cluster.
         :return: The dictionary containing the gas data of the cluster.
         """
-        # load data from file
-        gas_temperatures = np.load(
-            self.config.data_home / "particle_temperatures" / "TNG300_1"
-            / f"particle_temperatures_halo_{halo_id}.npy"
-        )
-        gas_distances = np.load(
-            self.config.data_home / "particle_distances" / "TNG300_1"
-            / f"particle_distances_halo_{halo_id}.npy"
-        )
-        gas_masses = np.load(
-            self.config.data_home / "particle_masses" / "TNG300_1"
-            / f"gas_masses_halo_{halo_id}.npy"
-        )
-        radial_velocities = np.load(
-            self.config.data_home / "particle_velocities" / "TNG300_1"
-            / f"radial_velocity_halo_{halo_id}.npy"
-        )
-
-        # if the max distance is set to 2R_vir, the data is already complete
-        if self.max_distance == 2.0:
-            gas_data = {
-                "Temperatures": gas_temperatures,
-                "Distances": gas_distances,
-                "Masses": gas_masses,
-                "RadialVelocities": radial_velocities,
-            }
-            return gas_data
-
-        # otherwise restrict the data to only the given distance
-        mask = np.where(gas_distances <= self.max_distance)
+        # load data from file; if only some particles are required, map
+        # the files into memory to read only the selected particles
+        restrict = self.max_distance < 2.0 or self.regime != "total"
+        mmap_mode = "r" if restrict else None
         gas_data = {
-            "Temperatures": gas_temperatures[mask],
-            "Distances": gas_distances[mask],
-            "Masses": gas_masses[mask],
-            "RadialVelocities": radial_velocities[mask],
+            "Temperatures": np.load(
+                self.config.data_home / "particle_temperatures" / "TNG300_1"
+                / f"particle_temperatures_halo_{halo_id}.npy",
+                mmap_mode=mmap_mode,
+            ),
+            "Distances": np.load(
+                self.config.data_home / "particle_distances" / "TNG300_1"
+                / f"particle_distances_halo_{halo_id}.npy",
+                mmap_mode=mmap_mode,
+            ),
+            "Masses": np.load(
+                self.config.data_home / "particle_masses" / "TNG300_1"
+                / f"gas_masses_halo_{halo_id}.npy",
+                mmap_mode=mmap_mode,
+            ),
+            "RadialVelocities": np.load(
+                self.config.data_home / "particle_velocities" / "TNG300_1"
+                / f"radial_velocity_halo_{halo_id}.npy",
+                mmap_mode=mmap_mode,
+            ),
         }
-        return gas_data
+        if not restrict:
+            return gas_data
+        return self._select_particles(gas_data)
 
     def _get_tngclstr_gas_data(
         self,
@@ -361,7 +398,13 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         The function loads the particle data for all particles of the
         original zoom-region and reduces it to only those particles
         within the region specified (default is all particles within
-        two virial radii).
+        two virial radii) and within the current temperature regime.
+
+        The data of all particles within two virial radii is cached as
+        float32 in an uncompressed data file on the first call for a
+        cluster and radius definition. Later calls read the cache instead
+        of the simulation data, memory-mapping it when only a subregion
+        is required. A corrupt cache file is rebuilt.
 
         Returned dictionary will have only the keys required for further
         processing:
@@ -372,8 +415,94 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         - RadialVelocities
 
         :param halo_id: ID of the cluster.
+        :param halo_pos: Position of the cluster in ckpc.
+        :param halo_vel: Velocity of the cluster in km/s.
+        :param halo_radius: Virial radius of the cluster in ckpc.
         :return: The dictionary containing the gas data of the cluster.
         """
+        # distances are in units of the cluster radius, so the cache
+        # is only valid for the same radius definition
+        cache_file = (
+            self.gas_data_cache_dir / f"gas_data_{self.config.snap_num}_"
+            f"{self.config.radius_field}_cluster_{halo_id}.npz"
+        )
+        restrict = self.max_distance < 2.0 or self.regime != "total"
+        gas_data = None
+        if cache_file.exists():
+            try:
+                gas_data = load_npz.load_arrays_from_npz(
+                    cache_file, mmap=restrict
+                )
+            except (zipfile.BadZipFile, ValueError):
+                logging.warning(
+                    f"Cached gas data of TNG-Cluster cluster {halo_id} is "
+                    f"corrupt. Rebuilding it."
+                )
+        if gas_data is None:
+            self._cache_tngclstr_gas_data(
+                cache_file, halo_id, halo_pos, halo_vel, halo_radius
+            )
+            gas_data = load_npz.load_arrays_from_npz(
+                cache_file, mmap=restrict
+            )
+        if not restrict:
+            return gas_data
+        return self._select_particles(gas_data)
+
+    def _select_particles(
+        self, gas_data: dict[str, NDArray]
+    ) -> dict[str, NDArray]:
+        """
+        Restrict gas data to the chosen region and temperature regime.
+
+        Only the temperatures and distances are read in full to select
+        the particles. If the data arrays are memory-mapped, only the
+        selected particles are read from the other arrays.
+
+        :param gas_data: The dictionary of the gas data of a cluster,
+            holding the keys listed in :meth:`_get_profile_of_cluster`.
+        :return: The dictionary of the gas data of only the particles
+            within ``max_distance`` and the current temperature regime.
+        """
+        # translator for temperature regime to mask index
+        regime_to_index = {"cool": 1, "warm": 2, "hot": 3}
+        selected = gas_data["Distances"] <= self.max_distance
+        if self.regime != "total":
+            # only one regime is kept, so compare against its bin edges
+            # directly instead of digitizing into all regimes
+            index = regime_to_index[self.regime]
+            lower = self.temperature_bins[index - 1]
+            upper = self.temperature_bins[index]
+            log_temperatures = np.log10(gas_data["Temperatures"])
+            selected &= log_temperatures >= lower
+            selected &= log_temperatures < upper
+        # the gathers read the selected particles into memory
+        indices = np.nonzero(selected)[0]
+        return {field: value[indices] for field, value in gas_data.items()}
+
+    def _cache_tngclstr_gas_data(
+        self,
+        cache_file: Path,
+        halo_id: int,
+        halo_pos: NDArray,
+        halo_vel: NDArray,
+        halo_radius: float,
+    ) -> None:
+        """
+        Save the gas data of a TNG-Cluster cluster to a cache file.
+
+        The data is loaded from the simulation data and restricted to
+        all particles within two virial radii, the largest region the
+        pipeline supports.
+
+        :param cache_file: Path of the ``.npz`` file to write.
+        :param halo_id: ID of the cluster.
+        :param halo_pos: Position of the cluster in ckpc.
+        :param halo_vel: Velocity of the cluster in km/s.
+        :param halo_radius: Virial radius of the cluster in ckpc.
+        :return: None
+        """
+        logging.debug(f"Caching gas data of TNG-Cluster cluster {halo_id}.")
         # load data from catalogue
         gas_temperatures = gas_daq.get_cluster_temperature(
             self.tngclstr_basepath,
@@ -389,9 +518,10 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
         )
 
         # calculate derived quantities
-        gas_distances = np.linalg.norm(
-            gas_data["Coordinates"] - halo_pos, axis=1
-        ) / halo_radius
+        offsets = gas_data["Coordinates"] - halo_pos
+        gas_distances = np.sqrt(np.einsum("ij,ij->i", offsets, offsets))
+        gas_distances /= halo_radius
+        del offsets
         radial_velocities = compute.get_radial_velocities(
             halo_pos,
             halo_vel,
@@ -399,17 +529,31 @@ class GenerateIndividualHistogramsPipeline(base.Pipeline):
             gas_data["Velocities"],
         )
 
-        # restrict data to only the particles within range
-        mask = np.where(gas_distances <= self.max_distance)
-
-        # construct result array
-        final_data = {
-            "Temperatures": gas_temperatures[mask],
-            "Distances": gas_distances[mask],
-            "Masses": gas_data["Masses"][mask],
-            "RadialVelocities": radial_velocities[mask],
-        }
-        return final_data
+        # restrict data to only the particles within two virial radii
+        mask = np.where(gas_distances <= 2.0)
+
+        # save uncompressed, so the cache can be memory-mapped, and as
+        # float32, the same precision as the TNG300-1 gas data; write to
+        # a temporary file first and move it into place, so that other
+        # runs never read a partially written cache file
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            dir=cache_file.parent, suffix=".npz", delete=False
+        ) as file:
+            try:
+                np.savez(
+                    file,
+                    Temperatures=gas_temperatures[mask].astype(np.float32),
+                    Distances=gas_distances[mask].astype(np.float32),
+                    Masses=gas_data["Masses"][mask].astype(np.float32),
+                    RadialVelocities=(
+                        radial_velocities[mask].astype(np.float32)
+                    ),
+                )
+            except BaseException:
+                os.remove(file.name)
+                raise
+        os.replace(file.name, cache_file)
 
 
 class PlotMeanProfilesPipeline(GenerateIndividualHistogramsPipeline):
@@ -484,30 +628,22 @@ class PlotMeanProfilesPipeline(GenerateIndividualHistogramsPipeline):
         histograms = np.ones((self.n_clusters, 4, self.radial_bins))
         masses = np.zeros(self.n_clusters)
         edges = np.linspace(0, self.max_distance, num=self.radial_bins + 1)
-        # TNG300-1
-        for i, filename in enumerate(tng_300_files):
-            with np.load(filename, "r") as data_file:
-                masses[i] = data_file["halo_mass"]
-                # unpack the histograms
-                histograms[i] = data_file["histograms"]
-                # test that the edges line up
-                np.testing.assert_allclose(
-                    data_file["edges"],
-                    edges,
-                    rtol=1e-4,
-                )
-        # TNG-Cluster
-        for i, filename in enumerate(tng_clstr_files):
-            with np.load(filename, "r") as data_file:
-                masses[i + self.n_tng300] = data_file["halo_mass"]
-                # unpack the histograms
-                histograms[i + self.n_tng300] = data_file["histograms"]
-                # test that the edges line up
-                np.testing.assert_allclose(
-                    data_file["edges"],
-                    edges,
-                    rtol=1e-4,
-                )
+        # read the files in threads, as file I/O releases the GIL
+        load = functools.partial(
+            load_npz.load_arrays_from_npz,
+            keys=["halo_mass", "histograms", "edges"],
+        )
+        with ThreadPoolExecutor(max_workers=_LOAD_THREADS) as executor:
+            results = executor.map(load, tng_300_files + tng_clstr_files)
+            for i, data in enumerate(results):
+                masses[i] = data["halo_mass"]
+                histograms[i] = data["histograms"]
+                # all clusters of a simulation are binned the same way,
+                # so test the edges line up only once per simulation
+                if i == 0 or i == self.n_tng300:
+                    np.testing.assert_allclose(
+                        data["edges"], edges, rtol=1e-4
+                    )
 
         # Return the histograms and edges
         return histograms, edges, masses
@@ -628,22 +764,22 @@ class PlotFlowRatioHistograms(PlotMeanProfilesPipeline):
         mass_bins = 10**np.linspace(14, 15.4, num=8)
         mask = selection.digitize_clusters(masses, mass_bins)
 
-        # Step 3: compute ratios of in- and outflow
+        # Step 3: compute ratios of in- and outflow; sum the total and
+        # inflow histograms and count the non-NaN entries per mass bin
+        # in a single pass, to find the NaN-ignoring means of all bins
+        values = histograms[:, :2]
+        valid = ~np.isnan(values)
+        sums = np.zeros((len(mass_bins), 2, self.radial_bins))
+        counts = np.zeros_like(sums)
+        np.add.at(sums, mask, np.where(valid, values, 0))
+        np.add.at(counts, mask, valid)
         mean_ratios = np.zeros((8, self.radial_bins))
-        for i in range(7):
-            bin_index = i + 1
-            mean_inflow = np.nanmean(
-                histograms[:, 1][mask == bin_index], axis=0
-            )
-            mean_total = np.nanmean(
-                histograms[:, 0][mask == bin_index], axis=0
-            )
-            # Mask in- and outflow only to current mass bin, find ratio
-            mean_ratios[i] = mean_inflow / mean_total
-        # add the mean ratio over all clusters
-        total_mean_inflow = np.nanmean(histograms[:, 1], axis=0)
-        total_mean_total = np.nanmean(histograms[:, 0], axis=0)
-        mean_ratios[-1] = total_mean_inflow / total_mean_total
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums[1:] / counts[1:]
+            mean_ratios[:7] = means[:, 1] / means[:, 0]
+            # add the mean ratio over all clusters
+            total_means = sums.sum(axis=0) / counts.sum(axis=0)
+            mean_ratios[-1] = total_means[1] / total_means[0]
 
         # Step 3: plot
         self._plot_ratios(mean_ratios, edges, mass_bins)
@@ -481,92 +481,32 @@ class IndividualRadialProfilePipeline(DiagnosticsPipeline):
             positions_tree
         )
 
-        # bin gas particles by temperature:
+        # label gas particles by temperature regime and flow direction:
+        # labels 0 to 5 are cool, warm and hot gas, alternating between
+        # inflow and outflow, 6 and 7 are gas outside these regimes
         mask = np.digitize(
             np.log10(restricted_gas_data["Temperatures"]),
             self.temperature_bins,
         )
-        cool_gas_data = selection.mask_data_dict(
-            restricted_gas_data, mask, index=1
-        )
-        warm_gas_data = selection.mask_data_dict(
-            restricted_gas_data, mask, index=2
-        )
-        hot_gas_data = selection.mask_data_dict(
-            restricted_gas_data, mask, index=3
-        )
-
-        # create a total density profile of infalling gas
-        infall_mask = restricted_gas_data["RadialVelocities"] >= 0
-        outflow_mask = restricted_gas_data["RadialVelocities"] < 0
-        total_in, edges = statistics.volume_normalized_radial_profile(
-            restricted_gas_data["Distances"][infall_mask],
-            restricted_gas_data["Masses"][infall_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-        total_out, _ = statistics.volume_normalized_radial_profile(
-            restricted_gas_data["Distances"][outflow_mask],
-            restricted_gas_data["Masses"][outflow_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-
-        # create density profile for cool gas
-        infall_mask = cool_gas_data["RadialVelocities"] >= 0
-        outflow_mask = cool_gas_data["RadialVelocities"] < 0
-        cool_in, _ = statistics.volume_normalized_radial_profile(
-            cool_gas_data["Distances"][infall_mask],
-            cool_gas_data["Masses"][infall_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-        cool_out, _ = statistics.volume_normalized_radial_profile(
-            cool_gas_data["Distances"][outflow_mask],
-            cool_gas_data["Masses"][outflow_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-
-        # create density profile for warm gas
-        infall_mask = warm_gas_data["RadialVelocities"] >= 0
-        outflow_mask = warm_gas_data["RadialVelocities"] < 0
-        warm_in, _ = statistics.volume_normalized_radial_profile(
-            warm_gas_data["Distances"][infall_mask],
-            warm_gas_data["Masses"][infall_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-        warm_out, _ = statistics.volume_normalized_radial_profile(
-            warm_gas_data["Distances"][outflow_mask],
-            warm_gas_data["Masses"][outflow_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-
-        # create density profile for hot gas
-        infall_mask = hot_gas_data["RadialVelocities"] >= 0
-        outflow_mask = hot_gas_data["RadialVelocities"] < 0
-        hot_in, _ = statistics.volume_normalized_radial_profile(
-            hot_gas_data["Distances"][infall_mask],
-            hot_gas_data["Masses"][infall_mask],
-            self.radial_bins,
-            virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
-        )
-        hot_out, _ = statistics.volume_normalized_radial_profile(
-            hot_gas_data["Distances"][outflow_mask],
-            hot_gas_data["Masses"][outflow_mask],
+        mask[(mask < 1) | (mask > 3)] = 4
+        labels = 2 * (mask - 1)
+        velocities = restricted_gas_data["RadialVelocities"]
+        labels += velocities < 0
+        labels[np.isnan(velocities)] = 8  # neither in- nor outflowing
+
+        # create density profiles of all labels in a single pass
+        hists, edges = statistics.volume_normalized_radial_profiles_by_label(
+            restricted_gas_data["Distances"],
+            restricted_gas_data["Masses"],
+            labels,
+            8,
             self.radial_bins,
+            self.ranges[0],
             virial_radius if self.normalize else None,
-            radial_range=self.ranges[0],
         )
+        cool_in, cool_out, warm_in, warm_out, hot_in, hot_out = hists[:6]
+        total_in = np.sum(hists[0::2], axis=0)
+        total_out = np.sum(hists[1::2], axis=0)
 
         # write data to file
         if self.to_file:
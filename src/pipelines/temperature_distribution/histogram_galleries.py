@@ -12,7 +12,6 @@ import numpy as np
 from library import compute
 from library.data_acquisition import gas_daq, halos_daq
 from library.loading import load_temperature_histograms
-from library.plotting import plot_temperature_histograms
 from library.processing import gas_temperatures, selection, sequential
 from pipelines import base
 
@@ -175,6 +174,10 @@ class GalleriesPipeline(base.Pipeline):
             selected halos. Must also have shape (M, 2P).
         :return: None
         """
+        # plotting module (and with it matplotlib) is only imported when
+        # plots are actually created
+        from library.plotting import plot_temperature_histograms
+
         # labels x axis
         if self.normalize:
             xlabel = r"Gas temperature $T / T_{vir}$ [dex]"
@@ -14,7 +14,12 @@ from library import compute
 from library.data_acquisition import gas_daq, halos_daq
 from library.loading import load_temperature_histograms
 from library.plotting import colormaps, plot_temperature_histograms, pltutil
-from library.processing import gas_temperatures, parallelization, sequential, statistics
+from library.processing import (
+    gas_temperatures,
+    parallelization,
+    sequential,
+    statistics,
+)
 from pipelines import base
 
 if TYPE_CHECKING:
@@ -78,7 +83,7 @@ class TemperatureHistogramsPipeline(base.Pipeline):
         virial_temperatures = self._get_virial_temperatures(halo_data)
 
         # Step 4: get primary data - histograms for every halo
-        begin = time.time()
+        begin = time.perf_counter_ns()
         logging.info("Calculating temperature histograms for all halos.")
         if self.normalize:
             norm = virial_temperatures
@@ -104,19 +109,20 @@ class TemperatureHistogramsPipeline(base.Pipeline):
         )
         if self.to_file:
             logging.info("Writing histogram data to file.")
-            filename = f"{self.paths['data_file_stem']}.npz"
-            np.savez(
-                self.paths["data_dir"] / filename,
-                hist_mean=mean,
-                hist_median=median,
-                hist_percentiles=perc,
-                halos_per_bin=nums,
-            )
-        end = time.time()
+            # one .npy file per array, so they can be memory-mapped
+            hist_data = {
+                "hist_mean": mean,
+                "hist_median": median,
+                "hist_percentiles": perc,
+                "halos_per_bin": nums,
+            }
+            for key, array in hist_data.items():
+                filename = f"{self.paths['data_file_stem']}_{key}.npy"
+                np.save(self.paths["data_dir"] / filename, array)
+        end = time.perf_counter_ns()
         # get time spent on computation
-        time_diff = end - begin
-        time_fmt = time.strftime('%H:%M:%S', time.gmtime(time_diff))
-        logging.info(f"Spent {time_fmt} hours on execution.")
+        time_fmt = base.format_duration((end - begin) / 1e9)
+        logging.info(f"Spent {time_fmt} (hh:mm:ss) on execution.")
 
         # Step 6: plot the data
         if self.no_plots:
@@ -260,8 +266,9 @@ class TemperatureHistogramsPipeline(base.Pipeline):
         else:
             xlabel = "Gas temperature [log K]"
         facecolor = "lightblue" if self.weights == "frac" else "pink"
-        # plot all mass bins
-        for i in range(len(self.mass_bin_edges) - 1):
+
+        # plot a single mass bin
+        def plot_mass_bin(i: int) -> None:
             error_bars = pltutil.get_errorbar_lengths(
                 median[i], percentiles[i]
             )
@@ -290,6 +297,21 @@ class TemperatureHistogramsPipeline(base.Pipeline):
                     a, self.temperature_divisions, self.temperature_range
                 )
             # save figure
+            self._save_fig(f, ident_flag=str(i))
+
+        # plot all mass bins; the figures are independent of each other,
+        # so they can be created in parallel
+        n_mass_bins = len(self.mass_bin_edges) - 1
+        if self.processes > 0:
+            parallelization.process_data_parallelized(
+                plot_mass_bin,
+                range(n_mass_bins),
+                min(self.processes, n_mass_bins),
+                chunksize=1,
+            )
+        else:
+            for i in range(n_mass_bins):
+                plot_mass_bin(i)
 
 
 class FromFilePipeline(TemperatureHistogramsPipeline):